@@ -0,0 +1,24 @@
+from contextlib import contextmanager
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.fixture
+def query_budget():
+    """Контекст-менеджер: тест падает, если внутри блока выполнено
+    больше SQL-запросов, чем заявлено в бюджете."""
+    @contextmanager
+    def budget(limit, label=''):
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        executed = len(context.captured_queries)
+        queries = '\n'.join(
+            query['sql'] for query in context.captured_queries
+        )
+        assert executed <= limit, (
+            f'{label}: выполнено {executed} SQL-запросов при бюджете '
+            f'{limit}:\n{queries}'
+        )
+    return budget
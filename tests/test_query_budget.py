@@ -0,0 +1,46 @@
+import pytest
+from django.core.cache import cache
+
+from posts.models import Comment, Follow, Post
+
+pytestmark = [pytest.mark.django_db]
+
+# Число SQL-запросов страницы не должно зависеть от числа постов на ней.
+# В каждый бюджет входят два запроса авторизации: сессия и пользователь,
+# у post_detail — ещё запрос валидаторов ETag/Last-Modified, у списков —
+# один оконный запрос превью комментариев на всю страницу. Кэш перед
+# замером пуст, поэтому у index есть ещё попытка взять число постов из
+# sqlite_stat1 до COUNT(*).
+VIEW_BUDGETS = {
+    'index': ('/', 6),
+    'group_posts': ('/group/{slug}/', 6),
+    'profile': ('/profile/{username}/', 7),
+    'post_detail': ('/posts/{post_id}/', 5),
+    'follow_index': ('/follow/', 7),
+    'search': ('/search/?q=пост', 7),
+}
+
+
+def fill(mixer, author, group, count):
+    posts = mixer.cycle(count).blend(
+        Post, author=author, group=group, text='Тестовый пост', image=''
+    )
+    for post in posts:
+        mixer.cycle(2).blend(Comment, post=post, author=author)
+    return posts
+
+
+@pytest.mark.parametrize('count', [1, 15])
+@pytest.mark.parametrize('view', list(VIEW_BUDGETS))
+def test_view_query_budget(view, count, mixer, user_client, user,
+                           another_user, group, query_budget):
+    posts = fill(mixer, another_user, group, count)
+    Follow.objects.create(user=user, author=another_user)
+    url, budget = VIEW_BUDGETS[view]
+    url = url.format(
+        slug=group.slug, username=another_user.username, post_id=posts[0].pk
+    )
+    cache.clear()
+    with query_budget(budget, f'{view} ({count} постов)'):
+        response = user_client.get(url)
+    assert response.status_code == 200
@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.core import signing
+from django.middleware.csrf import CsrfViewMiddleware
+from django.utils.crypto import constant_time_compare
+from posts.models import User
+
+token_salt: str = "api.token"
+safe_methods: tuple = ("GET", "HEAD", "OPTIONS")
+
+
+def issue_token(user):
+    """Подписанный токен пользователя для заголовка Authorization.
+
+    В токен входит хэш пароля (как в сессии), поэтому смена пароля
+    отзывает все выданные токены.
+    """
+    return signing.dumps(
+        {"user": user.pk, "hash": user.get_session_auth_hash()},
+        salt=token_salt,
+    )
+
+
+def token_user(token):
+    """Пользователь по токену или None для битого и просроченного."""
+    try:
+        data = signing.loads(
+            token, salt=token_salt, max_age=settings.API_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return None
+    if not isinstance(data, dict):
+        return None
+    user = User.objects.filter(pk=data.get("user"), is_active=True).first()
+    if user is None or not constant_time_compare(
+        str(data.get("hash")), user.get_session_auth_hash()
+    ):
+        return None
+    return user
+
+
+class TokenError(ValueError):
+    pass
+
+
+class CsrfCheck(CsrfViewMiddleware):
+    """Проверка CSRF из middleware, возвращающая причину отказа."""
+
+    def _reject(self, request, reason):
+        return reason
+
+
+def authenticate_request(request):
+    """Ставит request.user по заголовку "Authorization: Bearer <токен>".
+
+    Без заголовка остаётся пользователь сессии, и для записи проверяется
+    CSRF, как у обычных форм. С токеном CSRF не нужен: браузер сам такой
+    заголовок не подставит. Возвращает причину отказа CSRF или None.
+    """
+    header = request.META.get("HTTP_AUTHORIZATION")
+    if header:
+        scheme, _, token = header.partition(" ")
+        user = token_user(token.strip()) if scheme == "Bearer" else None
+        if user is None:
+            raise TokenError("Неверный или просроченный токен.")
+        request.user = user
+        return None
+    if request.method in safe_methods:
+        return None
+    return CsrfCheck().process_view(request, None, (), {})
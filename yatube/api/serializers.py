@@ -0,0 +1,93 @@
+from django.core.files.storage import default_storage
+from posts.thumbnails import ready_urls
+
+thumbnail_geometry: str = "1080x256"
+
+# Поле ответа -> выражение для values(). Списки читаются через values(),
+# без создания экземпляров моделей.
+post_fields: dict = {
+    "id": "id",
+    "text": "text",
+    "pub_date": "pub_date",
+    "updated_at": "updated_at",
+    "author": "author__username",
+    "group": "group__slug",
+    "comments_count": "comments_count",
+    "image": "image",
+    "thumbnail": "image",
+}
+comment_fields: dict = {
+    "id": "id",
+    "post": "post_id",
+    "author": "author__username",
+    "text": "text",
+    "pub_date": "pub_date",
+}
+group_fields: dict = {
+    "id": "id",
+    "title": "title",
+    "slug": "slug",
+    "description": "description",
+}
+follow_fields: dict = {
+    "author": "author__username",
+}
+
+
+class FieldsError(ValueError):
+    pass
+
+
+def requested_fields(request, available):
+    """Поля из ?fields=a,b; без параметра — все доступные."""
+    raw = request.GET.get("fields")
+    if not raw:
+        return list(available)
+    fields = [field.strip() for field in raw.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        raise FieldsError(f"Неизвестные поля: {', '.join(unknown)}")
+    return fields
+
+
+def columns(fields, available, required=()):
+    """Колонки values(): выбранные поля и нужные пагинации."""
+    return list(dict.fromkeys(
+        [available[field] for field in fields] + list(required)
+    ))
+
+
+def _media_url(request, name):
+    return request.build_absolute_uri(default_storage.url(name))
+
+
+def represent_many(request, rows, fields, available):
+    """Строки values() в словари ответа с абсолютными адресами картинок.
+
+    Миниатюра отдаётся, только если уже создана: её адрес берётся из
+    кэша одним запросом на всю страницу, а недостающие миниатюры
+    создаются в фоне, и до этого поле равно None.
+    """
+    thumbnails = {}
+    if "thumbnail" in fields:
+        names = [row[available["thumbnail"]] for row in rows]
+        thumbnails = ready_urls(filter(None, names), thumbnail_geometry)
+    results = []
+    for row in rows:
+        data = {}
+        for field in fields:
+            value = row[available[field]]
+            if field == "image":
+                value = _media_url(request, value) if value else None
+            elif field == "thumbnail":
+                value = thumbnails.get(value)
+                if value:
+                    value = request.build_absolute_uri(value)
+            data[field] = value
+        results.append(data)
+    return results
+
+
+def represent(request, row, fields, available):
+    """Одна строка values() в словарь ответа."""
+    return represent_many(request, [row], fields, available)[0]
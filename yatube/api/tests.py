@@ -0,0 +1,240 @@
+import json
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post
+from posts.thumbnails import pregenerate
+
+User = get_user_model()
+cnt_test_posts: int = 25
+cnt_image_posts: int = 5
+
+test_img = (
+    b"\x47\x49\x46\x38\x39\x61\x02\x00"
+    b"\x01\x00\x80\x00\x00\x00\x00\x00"
+    b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
+    b"\x00\x00\x00\x2C\x00\x00\x00\x00"
+    b"\x02\x00\x01\x00\x00\x02\x02\x0C"
+    b"\x0A\x00\x3B"
+)
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="writer")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="Совы", slug="owls", description="Про сов"
+        )
+        Post.objects.bulk_create([
+            Post(text=f"Пост {number}", author=cls.author, group=cls.group)
+            for number in range(cnt_test_posts)
+        ])
+        cls.post = Post.objects.order_by("pk").first()
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def send(self, client, method, url, data):
+        return getattr(client, method)(
+            url, json.dumps(data), content_type="application/json"
+        )
+
+    def test_posts_cursor_pages(self):
+        """Список постов листается курсором без повторов."""
+        seen = []
+        url = reverse("api:posts")
+        while url:
+            data = self.client.get(url).json()
+            seen.extend(item["id"] for item in data["results"])
+            url = data["next"]
+        self.assertEqual(len(seen), cnt_test_posts)
+        self.assertEqual(len(set(seen)), cnt_test_posts)
+
+    def test_list_queries_and_payload(self):
+        """Список — один SQL-запрос, ?fields= уменьшает ответ."""
+        url = reverse("api:posts")
+        with self.assertNumQueries(1):
+            full = self.client.get(url)
+        sparse = self.client.get(url, {"fields": "id,text"})
+        self.assertEqual(
+            set(sparse.json()["results"][0]), {"id", "text"}
+        )
+        self.assertLess(len(sparse.content), len(full.content) / 2)
+        self.assertLess(len(full.content), 300 * 20)
+
+    def test_unknown_field(self):
+        """Неизвестное поле в ?fields= — ошибка 400."""
+        response = self.client.get(reverse("api:posts"), {"fields": "pwd"})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_create_and_edit_post(self):
+        """Автор создаёт и правит пост, чужой пост править нельзя."""
+        response = self.send(
+            self.author_client, "post", reverse("api:posts"),
+            {"text": "Новый пост", "group": "owls"},
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertEqual(response.json()["group"], "owls")
+        url = reverse("api:post", args=[response.json()["id"]])
+        response = self.send(
+            self.author_client, "patch", url, {"text": "Исправлено"}
+        )
+        self.assertEqual(response.json()["text"], "Исправлено")
+        self.assertEqual(response.json()["group"], "owls")
+        response = self.send(
+            self.reader_client, "patch", url, {"text": "Чужой"}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        response = self.send(self.client, "post", reverse("api:posts"),
+                             {"text": "Аноним"})
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
+    def test_comments(self):
+        """Комментарии создаются и читаются через API."""
+        url = reverse("api:comments", args=[self.post.pk])
+        response = self.send(
+            self.reader_client, "post", url, {"text": "Угу"}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertEqual(Comment.objects.get().author, self.reader)
+        data = self.client.get(url).json()
+        self.assertEqual(
+            [item["text"] for item in data["results"]], ["Угу"]
+        )
+
+    def test_groups(self):
+        """Группы отдаются списком и по slug."""
+        data = self.client.get(reverse("api:groups")).json()
+        self.assertEqual([item["slug"] for item in data["results"]],
+                         ["owls"])
+        response = self.client.get(reverse("api:group", args=["none"]))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_groups_and_follows_cursor_pages(self):
+        """Группы и подписки листаются курсором по slug и имени автора."""
+        for slug in ("bats", "cats"):
+            Group.objects.create(title=slug, slug=slug, description="")
+            author = User.objects.create_user(username=slug)
+            Follow.objects.create(user=self.reader, author=author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        cases = (
+            (reverse("api:groups"), "slug", ["bats", "cats", "owls"]),
+            (reverse("api:follows"), "author", ["bats", "cats", "writer"]),
+        )
+        for url, field, expected in cases:
+            with self.subTest(url=url):
+                seen = []
+                url = f"{url}?limit=2"
+                while url:
+                    data = self.reader_client.get(url).json()
+                    seen.extend(item[field] for item in data["results"])
+                    url = data["next"]
+                self.assertEqual(seen, expected)
+                previous = self.reader_client.get(data["previous"]).json()
+                self.assertEqual(
+                    [item[field] for item in previous["results"]],
+                    expected[:2],
+                )
+
+    def test_token_auth_without_csrf(self):
+        """Клиент без браузера пишет с токеном, сессии нужен CSRF."""
+        self.author.set_password("secret")
+        self.author.save()
+        client = Client(enforce_csrf_checks=True)
+        response = self.send(
+            client, "post", reverse("api:token"),
+            {"username": "writer", "password": "wrong"},
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        token = self.send(
+            client, "post", reverse("api:token"),
+            {"username": "writer", "password": "secret"},
+        ).json()["token"]
+        response = client.post(
+            reverse("api:posts"), json.dumps({"text": "С телефона"}),
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertEqual(response.json()["author"], "writer")
+        client.force_login(self.author)
+        response = self.send(
+            client, "post", reverse("api:posts"), {"text": "Без CSRF"}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        self.author.set_password("changed")
+        self.author.save()
+        response = self.client.get(
+            reverse("api:follows"), HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
+    def test_follows(self):
+        """Подписка и отписка через API."""
+        url = reverse("api:follows")
+        response = self.send(
+            self.reader_client, "post", url, {"author": "writer"}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertTrue(Follow.objects.filter(user=self.reader).exists())
+        data = self.reader_client.get(url).json()
+        self.assertEqual(data["results"], [{"author": "writer"}])
+        response = self.reader_client.delete(
+            reverse("api:follow", args=["writer"])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+        self.assertFalse(Follow.objects.exists())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ApiThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username="writer")
+        for number in range(cnt_image_posts):
+            Post.objects.create(
+                text=f"Пост {number}", author=author,
+                image=SimpleUploadedFile(
+                    name=f"api_{number}.gif", content=test_img,
+                    content_type="image/gif",
+                ),
+            )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_list_does_not_render_thumbnails(self):
+        """Список с картинками — один SQL-запрос, миниатюры только готовые."""
+        url = reverse("api:posts")
+        with self.assertNumQueries(1):
+            results = self.client.get(url).json()["results"]
+        self.assertEqual(len(results), cnt_image_posts)
+        self.assertEqual({item["thumbnail"] for item in results}, {None})
+        for post in Post.objects.all():
+            pregenerate(post.image.name)
+        with self.assertNumQueries(1):
+            results = self.client.get(url).json()["results"]
+        for item in results:
+            with self.subTest(post=item["id"]):
+                self.assertTrue(item["thumbnail"].startswith("http://"))
+                self.assertIn("/cache/", item["thumbnail"])
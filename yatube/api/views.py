@@ -0,0 +1,326 @@
+import json
+from functools import wraps
+from http import HTTPStatus
+
+from core.paginators import CursorPaginator, KeysetPaginator
+from django.contrib.auth import authenticate
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.http import urlencode
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from posts.forms import CommentForm, PostForm
+from posts.models import Comment, Follow, Group, Post, User
+from posts.thumbnails import schedule as schedule_thumbnails
+
+from .auth import TokenError, authenticate_request, issue_token
+from .serializers import (FieldsError, columns, comment_fields,
+                          follow_fields, group_fields, post_fields,
+                          represent, represent_many, requested_fields)
+
+cnt_items: int = 20
+max_items: int = 100
+
+
+def api_response(data, status=HTTPStatus.OK):
+    return JsonResponse(
+        data, status=status, safe=False,
+        json_dumps_params={"ensure_ascii": False},
+    )
+
+
+def api_error(detail, status):
+    return api_response({"detail": detail}, status)
+
+
+def api_view(view):
+    """Аутентификация API: токен из Authorization или сессия с CSRF."""
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            rejected = authenticate_request(request)
+        except TokenError as error:
+            return api_error(str(error), HTTPStatus.UNAUTHORIZED)
+        if rejected is not None:
+            return api_error(
+                f"Проверка CSRF не пройдена: {rejected}. Клиентам без "
+                "браузера нужен заголовок Authorization: Bearer <токен>.",
+                HTTPStatus.FORBIDDEN,
+            )
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def api_login_required(view):
+    """Как login_required, но для API: 401 вместо редиректа на форму."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return api_error(
+                "Требуется авторизация.", HTTPStatus.UNAUTHORIZED
+            )
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def writes_login_required(view):
+    """Чтение открыто всем, запись — только авторизованным."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method in ("GET", "HEAD"):
+            return view(request, *args, **kwargs)
+        return api_login_required(view)(request, *args, **kwargs)
+    return wrapper
+
+
+def request_data(request):
+    """Тело запроса: JSON или обычная форма (для загрузки картинок)."""
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            raise ValueError("Тело запроса должно быть JSON-объектом.")
+        return data, None
+    return request.POST.dict(), request.FILES
+
+
+def page_size(request):
+    try:
+        limit = int(request.GET.get("limit", cnt_items))
+    except ValueError:
+        return cnt_items
+    return max(1, min(limit, max_items))
+
+
+def _page_url(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query["cursor"] = cursor
+    return request.build_absolute_uri(
+        f"{request.path}?{urlencode(query, doseq=True)}"
+    )
+
+
+def cursor_list(request, queryset, available, key=None):
+    """Страница списка по курсору, сериализованная через values().
+
+    Без key порядок — от новых к старым по (pub_date, id), с key — по
+    возрастанию уникального поля key.
+    """
+    try:
+        fields = requested_fields(request, available)
+    except FieldsError as error:
+        return api_error(str(error), HTTPStatus.BAD_REQUEST)
+    if key is None:
+        rows = queryset.values(
+            *columns(fields, available, ("id", "pub_date"))
+        )
+        paginator = CursorPaginator(rows, page_size(request))
+    else:
+        rows = queryset.values(*columns(fields, available, (key,)))
+        paginator = KeysetPaginator(rows, page_size(request), key)
+    page = paginator.get_page(request.GET.get("cursor"))
+    return api_response({
+        "results": represent_many(request, page, fields, available),
+        "next": _page_url(request, page.next_cursor),
+        "previous": _page_url(request, page.previous_cursor),
+    })
+
+
+def single(request, queryset, available):
+    try:
+        fields = requested_fields(request, available)
+    except FieldsError as error:
+        return api_error(str(error), HTTPStatus.BAD_REQUEST)
+    row = queryset.values(*columns(fields, available)).first()
+    if row is None:
+        return api_error("Не найдено.", HTTPStatus.NOT_FOUND)
+    return api_response(represent(request, row, fields, available))
+
+
+def _post_form(request, instance=None):
+    data, files = request_data(request)
+    if instance is not None:
+        data = {
+            "text": instance.text,
+            "group": instance.group.slug if instance.group_id else None,
+            **data,
+        }
+    slug = data.get("group")
+    if slug:
+        group = Group.objects.filter(slug=slug).values_list(
+            "pk", flat=True
+        ).first()
+        data["group"] = group if group is not None else -1
+    return PostForm(data, files=files, instance=instance)
+
+
+def _save_post(request, form, status):
+    if not form.is_valid():
+        return api_response(
+            {"errors": form.errors}, HTTPStatus.BAD_REQUEST
+        )
+    post = form.save(commit=False)
+    if post.author_id is None:
+        post.author = request.user
+    post.save()
+    if "image" in form.changed_data:
+        schedule_thumbnails(post)
+    return api_response(
+        represent(
+            request,
+            Post.objects.filter(pk=post.pk).values(
+                *columns(post_fields, post_fields)
+            ).get(),
+            list(post_fields), post_fields,
+        ),
+        status,
+    )
+
+
+@require_http_methods(["GET", "POST"])
+@api_view
+@writes_login_required
+def posts(request):
+    if request.method == "POST":
+        try:
+            form = _post_form(request)
+        except ValueError as error:
+            return api_error(str(error), HTTPStatus.BAD_REQUEST)
+        return _save_post(request, form, HTTPStatus.CREATED)
+    queryset = Post.objects.all()
+    if request.GET.get("group"):
+        queryset = queryset.filter(group__slug=request.GET["group"])
+    if request.GET.get("author"):
+        queryset = queryset.filter(author__username=request.GET["author"])
+    return cursor_list(request, queryset, post_fields)
+
+
+@require_http_methods(["GET", "PATCH", "DELETE"])
+@api_view
+@writes_login_required
+def post(request, post_id):
+    if request.method == "GET":
+        return single(request, Post.objects.filter(pk=post_id), post_fields)
+    instance = get_object_or_404(
+        Post.objects.select_related("group"), pk=post_id
+    )
+    if instance.author_id != request.user.pk:
+        return api_error(
+            "Изменять пост может только автор.", HTTPStatus.FORBIDDEN
+        )
+    if request.method == "DELETE":
+        instance.delete()
+        return HttpResponse(status=HTTPStatus.NO_CONTENT)
+    try:
+        form = _post_form(request, instance)
+    except ValueError as error:
+        return api_error(str(error), HTTPStatus.BAD_REQUEST)
+    return _save_post(request, form, HTTPStatus.OK)
+
+
+@require_http_methods(["GET", "POST"])
+@api_view
+@writes_login_required
+def comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return api_error("Не найдено.", HTTPStatus.NOT_FOUND)
+    if request.method == "POST":
+        try:
+            data, _ = request_data(request)
+        except ValueError as error:
+            return api_error(str(error), HTTPStatus.BAD_REQUEST)
+        form = CommentForm(data)
+        if not form.is_valid():
+            return api_response(
+                {"errors": form.errors}, HTTPStatus.BAD_REQUEST
+            )
+        comment = form.save(commit=False)
+        comment.author = request.user
+        comment.post_id = post_id
+        comment.save()
+        response = single(
+            request, Comment.objects.filter(pk=comment.pk), comment_fields
+        )
+        response.status_code = HTTPStatus.CREATED
+        return response
+    return cursor_list(
+        request, Comment.objects.filter(post_id=post_id), comment_fields
+    )
+
+
+@require_http_methods(["GET"])
+@api_view
+def groups(request):
+    return cursor_list(request, Group.objects.all(), group_fields, "slug")
+
+
+@require_http_methods(["GET"])
+@api_view
+def group(request, slug):
+    return single(request, Group.objects.filter(slug=slug), group_fields)
+
+
+@require_http_methods(["GET", "POST"])
+@api_view
+@api_login_required
+def follows(request):
+    if request.method == "POST":
+        try:
+            data, _ = request_data(request)
+        except ValueError as error:
+            return api_error(str(error), HTTPStatus.BAD_REQUEST)
+        author = User.objects.filter(username=data.get("author")).first()
+        if author is None:
+            return api_error("Автор не найден.", HTTPStatus.BAD_REQUEST)
+        if author == request.user:
+            return api_error(
+                "Нельзя подписаться на себя.", HTTPStatus.BAD_REQUEST
+            )
+        _, created = Follow.objects.get_or_create(
+            user=request.user, author=author
+        )
+        return api_response(
+            {"author": author.username},
+            HTTPStatus.CREATED if created else HTTPStatus.OK,
+        )
+    return cursor_list(
+        request, Follow.objects.filter(user=request.user), follow_fields,
+        "author__username",
+    )
+
+
+@require_http_methods(["DELETE"])
+@api_view
+@api_login_required
+def follow(request, username):
+    deleted, _ = Follow.objects.filter(
+        user=request.user, author__username=username
+    ).delete()
+    if not deleted:
+        return api_error("Подписка не найдена.", HTTPStatus.NOT_FOUND)
+    return HttpResponse(status=HTTPStatus.NO_CONTENT)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def token(request):
+    """Токен для клиентов без браузера по имени и паролю."""
+    try:
+        data, _ = request_data(request)
+    except ValueError as error:
+        return api_error(str(error), HTTPStatus.BAD_REQUEST)
+    user = authenticate(
+        request,
+        username=data.get("username"),
+        password=data.get("password"),
+    )
+    if user is None:
+        return api_error(
+            "Неверное имя пользователя или пароль.", HTTPStatus.BAD_REQUEST
+        )
+    return api_response({"token": issue_token(user)})
@@ -0,0 +1,51 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def executor():
+    """Общий пул фоновых потоков процесса."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.BACKGROUND_WORKERS,
+                thread_name_prefix="yatube-background",
+            )
+    return _executor
+
+
+def _call(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception("Фоновая задача %s завершилась ошибкой", func)
+
+
+def _run_in_worker(func, args, kwargs):
+    try:
+        _call(func, args, kwargs)
+    finally:
+        # Поток пула открывает собственные соединения с БД.
+        connections.close_all()
+
+
+def submit(func, *args, **kwargs):
+    """Выполняет func в фоновом пуле после коммита текущей транзакции.
+
+    При BACKGROUND_WORKERS = 0 задача выполняется сразу в текущем потоке.
+    """
+    if not settings.BACKGROUND_WORKERS:
+        _call(func, args, kwargs)
+        return
+    transaction.on_commit(
+        lambda: executor().submit(_run_in_worker, func, args, kwargs)
+    )
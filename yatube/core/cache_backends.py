@@ -0,0 +1,344 @@
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from importlib.util import find_spec
+from urllib.parse import urlsplit
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+default_pool_size: int = 10
+near_max_entries: int = 256
+near_timeout: int = 2
+near_exclude: tuple = ("version:", "lock:", "stale_page:", "anon_page:")
+fallback_retry_interval: int = 30
+
+
+def _shared_backend(url, fallback_dir, pool_size):
+    parts = urlsplit(url)
+    if parts.scheme in ("redis", "rediss"):
+        primary = {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": url,
+            "OPTIONS": {
+                "CONNECTION_POOL_KWARGS": {"max_connections": pool_size},
+            },
+        }
+        client, errors = "django_redis", (
+            "django_redis.exceptions.ConnectionInterrupted",
+        )
+    elif parts.scheme == "memcached":
+        host, port = parts.hostname or "127.0.0.1", parts.port or 11211
+        primary = {
+            "BACKEND": "django.core.cache.backends.memcached.PyLibMCCache",
+            "LOCATION": f"{host}:{port}",
+            "OPTIONS": {"binary": True},
+        }
+        client, errors = "pylibmc", ("pylibmc.Error",)
+    else:
+        if parts.scheme == "file" and parts.path:
+            fallback_dir = parts.path
+        return {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": fallback_dir,
+        }
+    if not find_spec(client):
+        raise ImproperlyConfigured(
+            f"Для YATUBE_CACHE_URL={url} нужен пакет {client}"
+        )
+    return {
+        "BACKEND": "core.cache_backends.FallbackCache",
+        "LOCATION": fallback_dir,
+        "OPTIONS": {
+            "PRIMARY": primary,
+            "ERRORS": errors,
+            "RETRY_INTERVAL": fallback_retry_interval,
+        },
+    }
+
+
+def cache_settings(url, fallback_dir, pool_size=default_pool_size,
+                   near_cache=True):
+    """Собирает settings.CACHES из адреса общего кэша.
+
+    Без адреса используется LocMemCache процесса. redis:// (django-redis)
+    и memcached:// (pylibmc) требуют установленного клиента и работают
+    через FallbackCache: пока сервер не отвечает, запросы идут в общий
+    для воркеров узла FileBasedCache в fallback_dir. Перед общим кэшем
+    ставится NearCache.
+    """
+    if not url:
+        return {
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            }
+        }
+    shared = _shared_backend(url, fallback_dir, pool_size)
+    if not near_cache:
+        return {"default": shared}
+    return {
+        "shared": shared,
+        "default": {
+            "BACKEND": "core.cache_backends.NearCache",
+            "LOCATION": "shared",
+            "OPTIONS": {
+                "MAX_ENTRIES": near_max_entries,
+                "NEAR_TIMEOUT": near_timeout,
+                "NEAR_EXCLUDE": near_exclude,
+            },
+        },
+    }
+
+
+class NearCache(BaseCache):
+    """Маленький LRU в памяти процесса перед общим кэшем.
+
+    Значения живут локально не дольше NEAR_TIMEOUT секунд, поэтому горячие
+    ключи (первая страница index) не ходят в общий кэш на каждый запрос.
+    Ключи с префиксами из NEAR_EXCLUDE (версии, блокировки, записи
+    страниц без версии в ключе) всегда читаются из общего кэша, чтобы
+    инвалидация и пересчёт были общими для всех воркеров.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._shared_alias = location
+        self._near_timeout = options.get("NEAR_TIMEOUT", near_timeout)
+        self._exclude = tuple(options.get("NEAR_EXCLUDE", ()))
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    def _near(self, key):
+        return not key.startswith(self._exclude)
+
+    def _local_key(self, key, version):
+        local_key = self.make_key(key, version=version)
+        self.validate_key(local_key)
+        return local_key
+
+    def _remember(self, key, version, value):
+        if not self._near(key):
+            return
+        local_key = self._local_key(key, version)
+        expires = time.monotonic() + self._near_timeout
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._local[local_key] = (expires, payload)
+            self._local.move_to_end(local_key)
+            while len(self._local) > self._max_entries:
+                self._local.popitem(last=False)
+
+    def _recall(self, key, version):
+        if not self._near(key):
+            return None
+        local_key = self._local_key(key, version)
+        with self._lock:
+            entry = self._local.get(local_key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._local[local_key]
+                return None
+            self._local.move_to_end(local_key)
+        return entry
+
+    def _forget(self, key, version):
+        with self._lock:
+            self._local.pop(self._local_key(key, version), None)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version)
+        if added:
+            self._remember(key, version, value)
+        return added
+
+    def get(self, key, default=None, version=None):
+        entry = self._recall(key, version)
+        if entry is not None:
+            return pickle.loads(entry[1])
+        value = self.shared.get(key, default, version)
+        if value is not default:
+            self._remember(key, version, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        missing = []
+        for key in keys:
+            entry = self._recall(key, version)
+            if entry is None:
+                missing.append(key)
+            else:
+                found[key] = pickle.loads(entry[1])
+        if missing:
+            fetched = self.shared.get_many(missing, version)
+            for key, value in fetched.items():
+                self._remember(key, version, value)
+            found.update(fetched)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version)
+        self._remember(key, version, value)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version)
+        for key, value in data.items():
+            if key not in failed:
+                self._remember(key, version, value)
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        self._forget(key, version)
+        self.shared.delete(key, version)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self._forget(key, version)
+        self.shared.delete_many(keys, version)
+
+    def has_key(self, key, version=None):
+        if self._recall(key, version) is not None:
+            return True
+        return self.shared.has_key(key, version)
+
+    def incr(self, key, delta=1, version=None):
+        self._forget(key, version)
+        return self.shared.incr(key, delta, version)
+
+    def decr(self, key, delta=1, version=None):
+        self._forget(key, version)
+        return self.shared.decr(key, delta, version)
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+        self.shared.clear()
+
+
+class FallbackCache(BaseCache):
+    """Общий кэш, который переживает недоступность сервера.
+
+    Запросы идут в бэкенд PRIMARY. Если он отвечает ошибкой из ERRORS
+    (или OSError), в лог пишется предупреждение, и RETRY_INTERVAL секунд
+    запросы обслуживает FileBasedCache в LOCATION, после чего сервер
+    пробуется снова. Выбор делается во время работы, а не при импорте
+    настроек, поэтому воркер сам возвращается на сервер, когда тот
+    поднимется.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        common = {
+            name: params[name]
+            for name in ("TIMEOUT", "KEY_PREFIX", "VERSION", "KEY_FUNCTION")
+            if name in params
+        }
+        self._primary_params = {**common, **options["PRIMARY"]}
+        self._fallback_params = {
+            **common,
+            "BACKEND": "django.core.cache.backends.filebased."
+                       "FileBasedCache",
+            "LOCATION": location,
+        }
+        self._error_names = tuple(options.get("ERRORS", ()))
+        self._retry_interval = options.get(
+            "RETRY_INTERVAL", fallback_retry_interval
+        )
+        self._primary = None
+        self._fallback = None
+        self._errors = None
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _create(params):
+        return import_string(params["BACKEND"])(
+            params.get("LOCATION", ""), params
+        )
+
+    def _backends(self):
+        with self._lock:
+            if self._errors is None:
+                self._errors = (OSError,) + tuple(
+                    import_string(name) for name in self._error_names
+                )
+            if self._fallback is None:
+                self._fallback = self._create(self._fallback_params)
+            if time.monotonic() < self._down_until:
+                return None, self._fallback
+            if self._primary is None:
+                self._primary = self._create(self._primary_params)
+            return self._primary, self._fallback
+
+    def _call(self, method, *args, **kwargs):
+        primary, fallback = self._backends()
+        if primary is not None:
+            try:
+                return getattr(primary, method)(*args, **kwargs)
+            except self._errors as error:
+                logger.warning(
+                    "Общий кэш не ответил на %s (%s), %s с используется "
+                    "файловый кэш", method, error, self._retry_interval,
+                )
+                with self._lock:
+                    self._down_until = (
+                        time.monotonic() + self._retry_interval
+                    )
+        return getattr(fallback, method)(*args, **kwargs)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call("add", key, value, timeout, version)
+
+    def get(self, key, default=None, version=None):
+        return self._call("get", key, default, version)
+
+    def get_many(self, keys, version=None):
+        return self._call("get_many", keys, version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call("set", key, value, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call("set_many", data, timeout, version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call("touch", key, timeout, version)
+
+    def delete(self, key, version=None):
+        return self._call("delete", key, version)
+
+    def delete_many(self, keys, version=None):
+        return self._call("delete_many", keys, version)
+
+    def has_key(self, key, version=None):
+        return self._call("has_key", key, version)
+
+    def incr(self, key, delta=1, version=None):
+        return self._call("incr", key, delta, version)
+
+    def decr(self, key, delta=1, version=None):
+        return self._call("decr", key, delta, version)
+
+    def clear(self):
+        return self._call("clear")
+
+    def close(self, **kwargs):
+        for backend in (self._primary, self._fallback):
+            if backend is not None:
+                backend.close(**kwargs)
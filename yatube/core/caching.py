@@ -0,0 +1,256 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag, urlencode
+
+from .db_routers import use_primary
+from .versions import version_stamp
+
+
+def page_cache_key(request, key_prefix, namespaces):
+    """Ключ страницы: хост, адрес с query string, пользователь и версии.
+
+    Хост входит в ключ: в ленты и ответы API попадают абсолютные адреса.
+    """
+    path = hashlib.md5(
+        f"{request.get_host()}{request.get_full_path()}".encode()
+    ).hexdigest()
+    user = request.user.pk if request.user.is_authenticated else "anon"
+    stamp = version_stamp(*namespaces)
+    return f"page:{key_prefix}:{path}:{user}:{stamp}"
+
+
+def lock_key(key):
+    """Ключ блокировки пересчёта записи key.
+
+    Блокировки и записи без версии в ключе (stale_page:, anon_page:)
+    NearCache не держит в памяти процесса: иначе воркер видел бы свою
+    копию, а не обновлённую другим воркером.
+    """
+    return f"lock:{key}"
+
+
+def page_etag(key):
+    return quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+
+def _set_validators(response, etag, last_modified=None):
+    if response.status_code == 200 and not response.streaming:
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+
+
+def versioned_cache_page(timeout, key_prefix, namespaces):
+    """Кэширует GET-ответ view, пока не сменится версия его данных.
+
+    namespaces(request, *args, **kwargs) возвращает пространства имён
+    версий, от которых зависит страница; bump_version любого из них сразу
+    делает закэшированную страницу недостижимой, поэтому timeout может
+    быть большим. Ключ страницы служит и ETag: на If-None-Match с
+    совпадающим значением отдаётся 304 без обращения к кэшу страниц.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+            key = page_cache_key(
+                request, key_prefix, namespaces(request, *args, **kwargs)
+            )
+            etag = page_etag(key)
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                return response
+            response = cache.get(key)
+            if response is None:
+                with use_primary():
+                    response = view(request, *args, **kwargs)
+                _set_validators(response, etag)
+                if response.status_code == 200 and not response.streaming:
+                    cache.set(key, response, timeout)
+            return response
+        return wrapper
+    return decorator
+
+
+def _store_page(key, stamp, response, timeout, stale):
+    if response.status_code == 200 and not response.streaming:
+        cache.set(
+            key,
+            {
+                "stamp": stamp,
+                "expires": time.time() + timeout,
+                "response": response,
+            },
+            timeout + stale,
+        )
+
+
+def _fresh(entry, stamp):
+    return (
+        entry is not None
+        and entry["stamp"] == stamp
+        and entry["expires"] > time.time()
+    )
+
+
+def _wait_for_page(key, stamp, lock_timeout, poll_interval):
+    # Ждёт, пока владелец блокировки положит страницу этой версии.
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline and cache.get(lock_key(key)):
+        time.sleep(poll_interval)
+        entry = cache.get(key)
+        if entry is not None and entry["stamp"] == stamp:
+            return entry
+    return None
+
+
+def stampede_safe_cache_page(timeout, key_prefix, namespaces, stale=60,
+                             lock_timeout=10, poll_interval=0.05):
+    """versioned_cache_page без лавины пересчётов при истечении записи.
+
+    Запись страницы одна на адрес и пользователя и помнит версию, с
+    которой построена; в кэше она живёт ещё stale секунд после timeout.
+    Устаревшую по времени или по версии страницу пересчитывает один
+    запрос, взявший блокировку в кэше, а остальные в это время получают
+    прежнюю. Если прежней нет (холодный кэш), они ждут результат до
+    lock_timeout секунд и только потом рендерят сами.
+    """
+    def decorator(view):
+        def render(request, args, kwargs, etag):
+            with use_primary():
+                response = view(request, *args, **kwargs)
+            _set_validators(response, etag)
+            return response
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+            stamp = version_stamp(*namespaces(request, *args, **kwargs))
+            key = "stale_" + page_cache_key(request, key_prefix, ())
+            etag = page_etag(key + stamp)
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                return response
+            entry = cache.get(key)
+            if _fresh(entry, stamp):
+                return entry["response"]
+            if cache.add(lock_key(key), True, lock_timeout):
+                try:
+                    response = render(request, args, kwargs, etag)
+                    _store_page(key, stamp, response, timeout, stale)
+                finally:
+                    cache.delete(lock_key(key))
+                return response
+            entry = entry or _wait_for_page(
+                key, stamp, lock_timeout, poll_interval
+            )
+            if entry is None:
+                return render(request, args, kwargs, etag)
+            return entry["response"]
+        return wrapper
+    return decorator
+
+
+def conditional_page(key_prefix, validators):
+    """Отвечает 304 на условный GET, не вызывая view.
+
+    validators(request, *args, **kwargs) возвращает пространства имён
+    версий страницы и время её последнего изменения (или None). ETag
+    строится из версий, Last-Modified — из времени. В ETag входит и
+    секрет CSRF из cookie: после входа Django меняет его, и страница с
+    формой не должна отдаваться по 304 со старым токеном.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+            namespaces, modified = validators(request, *args, **kwargs)
+            key = page_cache_key(request, key_prefix, namespaces)
+            etag = page_etag(key + request.META.get("CSRF_COOKIE", ""))
+            last_modified = int(modified.timestamp()) if modified else None
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+                _set_validators(response, etag, last_modified)
+            return response
+        return wrapper
+    return decorator
+
+
+def _cache_when_done(chunks, key, timeout):
+    # Тело читается с основной базы (см. ReplicaRouter). Генератор
+    # продолжается уже после возврата из view, поэтому use_primary()
+    # включается на каждый шаг, а не держится между yield.
+    with use_primary():
+        chunks = iter(chunks())
+    parts = []
+    while True:
+        with use_primary():
+            chunk = next(chunks, None)
+        if chunk is None:
+            break
+        parts.append(chunk)
+        yield chunk
+    cache.set(key, b"".join(parts), timeout)
+
+
+def versioned_stream(request, key_prefix, namespaces, content_type,
+                     chunks, timeout):
+    """Ответ потоком с ETag; готовое тело кэшируется до смены версий.
+
+    chunks() вызывается только при промахе кэша: тело отдаётся клиенту
+    по мере генерации и сохраняется, когда поток дочитан до конца.
+    """
+    key = page_cache_key(request, key_prefix, namespaces)
+    etag = page_etag(key)
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        return response
+    body = cache.get(key)
+    if body is not None:
+        response = HttpResponse(body, content_type=content_type)
+    else:
+        response = StreamingHttpResponse(
+            _cache_when_done(chunks, key, timeout),
+            content_type=content_type,
+        )
+    response["ETag"] = etag
+    return response
+
+
+def _page_number(value):
+    # Paginator.get_page отдаёт первую страницу на всё, что не целое
+    # число, поэтому такие значения и page=1 дают один ключ с ?page=...
+    # без параметра; ведущие нули отбрасываются.
+    try:
+        number = int(value)
+    except ValueError:
+        return None
+    return None if number == 1 else str(number)
+
+
+def anonymous_page_key(request, view_name, params):
+    """Ключ страницы анонима: хост, путь и только значимые параметры.
+
+    params — параметры запроса, от которых зависит страница; остальные
+    (метки рекламы и т. п.) не дробят кэш.
+    """
+    query = []
+    for name in sorted(params):
+        value = request.GET.get(name)
+        if name == "page" and value is not None:
+            value = _page_number(value)
+        if value:
+            query.append((name, value))
+    raw = f"{request.get_host()}{request.path}?{urlencode(query)}"
+    return f"anon_page:{view_name}:{hashlib.md5(raw.encode()).hexdigest()}"
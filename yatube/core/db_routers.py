@@ -0,0 +1,64 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_primary_only = ContextVar("primary_only", default=False)
+
+
+def pin_primary():
+    """Переключает чтения в основную базу до unpin_primary(token)."""
+    return _primary_only.set(True)
+
+
+def unpin_primary(token):
+    _primary_only.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """Все чтения внутри блока идут в основную базу."""
+    token = pin_primary()
+    try:
+        yield
+    finally:
+        unpin_primary(token)
+
+
+def reading_from_primary():
+    return _primary_only.get() or connections[
+        DEFAULT_DB_ALIAS
+    ].in_atomic_block
+
+
+class ReplicaRouter:
+    """Пишет в default, читает из случайной реплики DATABASE_REPLICAS.
+
+    Чтения остаются в основной базе внутри транзакции и внутри
+    use_primary() — его включает ReplicaPinningMiddleware для запросов,
+    которые пишут, и для сессий, недавно писавших.
+
+    Версия в общем кэше меняется сразу после записи, а реплика может
+    отставать: страница, отрисованная с реплики, легла бы в кэш под новой
+    версией со старыми данными и жила бы там до следующей смены версии.
+    Поэтому всё, что заполняет кэши с версиями (core.caching,
+    AnonymousPageCacheMiddleware, cached_count), читает из default;
+    попадания в кэш базу не трогают вовсе.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or reading_from_primary():
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,118 @@
+import io
+import json
+
+from django.utils import feedgenerator
+from django.utils.xmlutils import SimplerXMLGenerator
+
+
+def feed_item(**fields):
+    """Элемент ленты в том же виде, что даёт SyndicationFeed.add_item."""
+    holder = feedgenerator.SyndicationFeed("", "", "")
+    holder.add_item(**fields)
+    return holder.items[0]
+
+
+class _StreamingFeedMixin:
+    """Пишет ленту по элементу, не собирая документ целиком.
+
+    Элементы передаются в stream() итератором, поэтому queryset можно
+    читать через iterator(). latest — дата самого свежего элемента для
+    lastBuildDate/updated: feedgenerator иначе ищет её в self.items.
+    """
+    latest = None
+
+    def latest_post_date(self):
+        return self.latest or super().latest_post_date()
+
+    def stream(self, items, encoding="utf-8"):
+        buffer = io.StringIO()
+        handler = SimplerXMLGenerator(buffer, encoding)
+
+        def drain():
+            chunk = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return chunk.encode(encoding)
+
+        handler.startDocument()
+        self.open_document(handler)
+        yield drain()
+        for item in items:
+            handler.startElement(self.item_element, self.item_attributes(item))
+            self.add_item_elements(handler, item)
+            handler.endElement(self.item_element)
+            yield drain()
+        self.close_document(handler)
+        yield drain()
+
+
+class StreamingRssFeed(_StreamingFeedMixin, feedgenerator.Rss201rev2Feed):
+    item_element = "item"
+
+    def open_document(self, handler):
+        handler.startElement("rss", self.rss_attributes())
+        handler.startElement("channel", self.root_attributes())
+        self.add_root_elements(handler)
+
+    def close_document(self, handler):
+        self.endChannelElement(handler)
+        handler.endElement("rss")
+
+
+class StreamingAtomFeed(_StreamingFeedMixin, feedgenerator.Atom1Feed):
+    item_element = "entry"
+
+    def open_document(self, handler):
+        handler.startElement("feed", self.root_attributes())
+        self.add_root_elements(handler)
+
+    def close_document(self, handler):
+        handler.endElement("feed")
+
+
+class StreamingJsonFeed:
+    """JSON Feed 1.1 (https://jsonfeed.org) с тем же интерфейсом."""
+    content_type = "application/feed+json; charset=utf-8"
+
+    def __init__(self, title, link, description, feed_url=None, **kwargs):
+        self.feed = {
+            "version": "https://jsonfeed.org/version/1.1",
+            "title": title,
+            "home_page_url": link,
+            "description": description,
+        }
+        if feed_url:
+            self.feed["feed_url"] = feed_url
+        self.latest = None
+
+    def item(self, item):
+        data = {
+            "id": item["unique_id"],
+            "url": item["link"],
+            "title": item["title"],
+            "content_text": item["description"],
+            "date_published": item["pubdate"].isoformat(),
+            "date_modified": item["updateddate"].isoformat(),
+            "authors": [{"name": item["author_name"]}],
+        }
+        if item.get("categories"):
+            data["tags"] = list(item["categories"])
+        return data
+
+    def stream(self, items, encoding="utf-8"):
+        head = json.dumps(self.feed, ensure_ascii=False)[:-1]
+        yield (head + ', "items": [').encode(encoding)
+        separator = ""
+        for item in items:
+            yield (separator + json.dumps(
+                self.item(item), ensure_ascii=False
+            )).encode(encoding)
+            separator = ", "
+        yield b"]}"
+
+
+feed_classes: dict = {
+    "rss": StreamingRssFeed,
+    "atom": StreamingAtomFeed,
+    "json": StreamingJsonFeed,
+}
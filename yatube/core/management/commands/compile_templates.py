@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.template_cache import compile_times
+
+
+class Command(BaseCommand):
+    help = (
+        "Компилирует все шаблоны из templates/ и показывает время "
+        "компиляции каждого, от медленных к быстрым."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--slowest", type=int, default=0,
+            help="Показать только N самых медленных шаблонов.",
+        )
+
+    def handle(self, *args, **options):
+        timings = compile_times()
+        shown = timings[:options["slowest"]] if options["slowest"] else (
+            timings
+        )
+        for name, elapsed, error in shown:
+            line = f"{elapsed:8.2f} мс  {name}"
+            if error:
+                self.stdout.write(self.style.ERROR(f"{line}  {error}"))
+            else:
+                self.stdout.write(line)
+        total = sum(elapsed for _, elapsed, _ in timings)
+        self.stdout.write(self.style.SUCCESS(
+            f"Шаблонов: {len(timings)}, всего {total:.1f} мс."
+        ))
+        broken = [name for name, _, error in timings if error]
+        if broken:
+            raise CommandError(
+                f"Шаблоны с ошибками: {', '.join(broken)}."
+            )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.replication import sync_replicas
+
+
+class Command(BaseCommand):
+    help = "Копирует основную SQLite-базу в файлы локальных реплик."
+
+    def handle(self, *args, **options):
+        synced = sync_replicas()
+        self.stdout.write(self.style.SUCCESS(
+            f"Обновлено реплик: {synced}."
+        ))
@@ -0,0 +1,195 @@
+import json
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import parse_http_date_safe
+from django.utils.module_loading import import_string
+
+from . import profiling
+from .caching import anonymous_page_key, lock_key
+from .db_routers import pin_primary, unpin_primary, use_primary
+from .replication import sync_replicas
+from .versions import version_stamp
+
+pin_cookie: str = "primary_until"
+safe_methods: tuple = ("GET", "HEAD", "OPTIONS")
+
+
+class ReplicaPinningMiddleware:
+    """Закрепляет чтения за основной базой после записи.
+
+    Пишущий запрос целиком работает с default и ставит cookie на
+    REPLICA_PIN_SECONDS: пока она жива, GET этого браузера тоже читают из
+    default, и автор сразу видит свой новый пост, даже если реплики
+    отстают.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def pinned(self, request):
+        if request.method not in safe_methods:
+            return True
+        try:
+            return float(request.COOKIES.get(pin_cookie, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS or not self.pinned(request):
+            return self.get_response(request)
+        with use_primary():
+            response = self.get_response(request)
+        if request.method not in safe_methods:
+            pin_seconds = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(
+                pin_cookie, str(time.time() + pin_seconds),
+                max_age=pin_seconds, httponly=True, samesite="Lax",
+            )
+            if settings.REPLICA_SYNC_AFTER_WRITE:
+                sync_replicas()
+        return response
+
+
+class PerformanceMiddleware:
+    """Метрики каждого запроса при PERF_INSTRUMENTATION = True.
+
+    Считает время запроса, число и время SQL-запросов (execute_wrapper
+    на всех соединениях), время рендера шаблонов, попадания и промахи
+    кэша и время генерации миниатюр. Отдаёт их в заголовке Server-Timing
+    и строкой JSON в лог yatube.perf; раз в PERF_DUMP_INTERVAL секунд
+    туда же пишется сводка по именам URL. Должен стоять первым, чтобы
+    время включало остальные middleware.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PERF_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        profiling.install()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = profiling.RequestMetrics()
+        start = time.perf_counter()
+        with profiling.collecting(metrics), ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(metrics.query_wrapper)
+                )
+            response = self.get_response(request)
+        wall = (time.perf_counter() - start) * 1000
+        match = request.resolver_match
+        record = metrics.record(
+            match.view_name if match else "unresolved",
+            request.method, response.status_code, wall,
+        )
+        response["Server-Timing"] = metrics.server_timing(wall)
+        profiling.logger.info(json.dumps(record, ensure_ascii=False))
+        profiling.aggregates.add(record)
+        profiling.aggregates.maybe_dump(settings.PERF_DUMP_INTERVAL)
+        return response
+
+
+class AnonymousPageCacheMiddleware:
+    """Кэш целых страниц для анонимных GET-запросов без cookie.
+
+    Страницы и их настройки задаёт ANONYMOUS_PAGE_CACHE: имя URL ->
+    timeout, значимые параметры запроса и функция пространств имён
+    версий (как у versioned_cache_page). Запись хранится ещё
+    ANONYMOUS_PAGE_CACHE_STALE секунд после timeout: устаревшую по
+    времени или по версии страницу перерисовывает один запрос под
+    блокировкой, а остальные в это время получают прежнюю.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.pages = {
+            view_name: (
+                page["timeout"],
+                tuple(page.get("params", ())),
+                import_string(page["namespaces"])
+                if page.get("namespaces") else None,
+            )
+            for view_name, page in settings.ANONYMOUS_PAGE_CACHE.items()
+        }
+
+    def cacheable(self, request):
+        return (
+            request.method in ("GET", "HEAD")
+            and not request.COOKIES
+            and "HTTP_AUTHORIZATION" not in request.META
+        )
+
+    def storable(self, request, response):
+        # Ответ, который ставит cookie (сессия, CSRF-токен в форме), общим
+        # быть не может; SessionMiddleware и CsrfViewMiddleware ставят их
+        # уже после этого middleware, поэтому смотрим на признаки в запросе.
+        session = getattr(request, "session", None)
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not request.META.get("CSRF_COOKIE_USED")
+            and not (session is not None and session.modified)
+            and "private" not in response.get("Cache-Control", "")
+        )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        page = self.pages.get(match.view_name) if match else None
+        if page is None or not self.cacheable(request):
+            return None
+        timeout, params, namespaces = page
+        key = anonymous_page_key(request, match.view_name, params)
+        stamp = version_stamp(
+            *namespaces(request, *view_args, **view_kwargs)
+        ) if namespaces else ""
+        entry = cache.get(key)
+        if entry is not None:
+            fresh = entry["stamp"] == stamp and entry["expires"] > time.time()
+            if fresh or not cache.add(
+                lock_key(key), True, settings.ANONYMOUS_PAGE_CACHE_LOCK
+            ):
+                response = entry["response"]
+                response = get_conditional_response(
+                    request,
+                    etag=response.get("ETag"),
+                    last_modified=parse_http_date_safe(
+                        response.get("Last-Modified")
+                    ),
+                ) or response
+                # Сессия при попадании не читается, и Vary: Cookie от
+                # SessionMiddleware сам не появится: без него прокси
+                # отдаст анонимную страницу вошедшему пользователю.
+                patch_vary_headers(response, ("Cookie",))
+                return response
+        # Страница ляжет в кэш под текущей версией: читаем её с основной
+        # базы, а не с отстающей реплики (см. ReplicaRouter).
+        request.anonymous_page = (key, stamp, timeout, pin_primary())
+        return None
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        page = getattr(request, "anonymous_page", None)
+        if page is None:
+            return response
+        key, stamp, timeout, token = page
+        unpin_primary(token)
+        if request.method == "GET" and self.storable(request, response):
+            patch_vary_headers(response, ("Cookie",))
+            cache.set(
+                key,
+                {
+                    "stamp": stamp,
+                    "expires": time.time() + timeout,
+                    "response": response,
+                },
+                timeout + settings.ANONYMOUS_PAGE_CACHE_STALE,
+            )
+        cache.delete(lock_key(key))
+        return response
@@ -11,3 +11,14 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class UpdatedModel(models.Model):
+    """Абстрактная модель, которая добавляет дату последнего изменения."""
+    updated_at = models.DateTimeField(
+        "Дата изменения",
+        auto_now=True,
+    )
+
+    class Meta:
+        abstract = True
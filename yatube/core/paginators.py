@@ -0,0 +1,349 @@
+import base64
+import binascii
+from collections.abc import Sequence
+from datetime import datetime
+
+from django.core.cache import cache
+from django.core.paginator import (EmptyPage, Page, PageNotAnInteger,
+                                   Paginator)
+from django.db import DatabaseError, connections, router
+from django.db.models import Q
+
+from . import background
+from .db_routers import use_primary
+from .versions import version_stamp
+
+NEXT: str = "n"
+PREVIOUS: str = "p"
+count_timeout: int = 60 * 60 * 24
+count_refresh_timeout: int = 60
+
+
+def encode_cursor(direction, obj):
+    """Непрозрачный токен позиции: направление, pub_date и id объекта.
+
+    obj — экземпляр модели или строка values() с ключами pub_date и id.
+    """
+    if isinstance(obj, dict):
+        pub_date, pk = obj["pub_date"], obj["id"]
+    else:
+        pub_date, pk = obj.pub_date, obj.pk
+    raw = f"{direction}|{pub_date.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Разбирает токен; для битого или пустого токена возвращает None."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, pub_date, pk = raw.split("|")
+        if direction not in (NEXT, PREVIOUS):
+            return None
+        return direction, datetime.fromisoformat(pub_date), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+class CursorPage(Sequence):
+    """Страница keyset-пагинации, совместимая с includes/paginator.html."""
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<CursorPage of {len(self.object_list)} objects>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Пагинация по ключу (pub_date, id) без COUNT(*) и OFFSET.
+
+    Работает с querysets моделей-наследников CreatedModel: страница
+    выбирается диапазоном по индексу pub_date, поэтому глубокие страницы
+    стоят столько же, сколько первая.
+    """
+
+    def __init__(self, object_list, per_page):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+
+    def get_page(self, cursor):
+        position = decode_cursor(cursor)
+        if position is not None and position[0] == PREVIOUS:
+            page = self._page_before(position[1], position[2])
+            if len(page):
+                return page
+        elif position is not None:
+            return self._page_after(position[1], position[2])
+        return self._page_after(None, None)
+
+    def _page_after(self, pub_date, pk):
+        queryset = self.object_list.order_by("-pub_date", "-pk")
+        if pub_date is not None:
+            queryset = queryset.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+            )
+        rows = list(queryset[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor(NEXT, rows[-1])
+        if rows and pub_date is not None:
+            previous_cursor = encode_cursor(PREVIOUS, rows[0])
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+    def _page_before(self, pub_date, pk):
+        queryset = self.object_list.order_by("pub_date", "pk").filter(
+            Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+        )
+        rows = list(queryset[:self.per_page + 1])
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        next_cursor = previous_cursor = None
+        if rows:
+            next_cursor = encode_cursor(NEXT, rows[-1])
+        if rows and has_previous:
+            previous_cursor = encode_cursor(PREVIOUS, rows[0])
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+
+def encode_key_cursor(direction, value):
+    """Токен позиции KeysetPaginator: направление и значение ключа."""
+    raw = f"{direction}|{value}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_key_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    direction, _, value = raw.partition("|")
+    if direction not in (NEXT, PREVIOUS) or not value:
+        return None
+    return direction, value
+
+
+class KeysetPaginator:
+    """Пагинация по курсору для списков без даты: по уникальному ключу.
+
+    Как CursorPaginator, но порядок — по возрастанию key (slug группы,
+    имя автора подписки). Строки — экземпляры моделей или словари
+    values(), в которых есть key.
+    """
+
+    def __init__(self, object_list, per_page, key):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.key = key
+
+    def _value(self, row):
+        if isinstance(row, dict):
+            return row[self.key]
+        for name in self.key.split("__"):
+            row = getattr(row, name)
+        return row
+
+    def get_page(self, cursor):
+        position = decode_key_cursor(cursor)
+        if position is not None and position[0] == PREVIOUS:
+            page = self._page(position[1], backwards=True)
+            if len(page):
+                return page
+        elif position is not None:
+            return self._page(position[1])
+        return self._page(None)
+
+    def _page(self, value, backwards=False):
+        ordering, lookup = (f"-{self.key}", "lt") if backwards else (
+            self.key, "gt"
+        )
+        queryset = self.object_list.order_by(ordering)
+        if value is not None:
+            queryset = queryset.filter(**{f"{self.key}__{lookup}": value})
+        rows = list(queryset[:self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, more
+        else:
+            has_next, has_previous = more, value is not None
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_key_cursor(NEXT, self._value(rows[-1]))
+        if rows and has_previous:
+            previous_cursor = encode_key_cursor(
+                PREVIOUS, self._value(rows[0])
+            )
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+
+class CountedPaginator(Paginator):
+    """Paginator с готовым числом объектов и окном номеров страниц.
+
+    count передаётся снаружи (счётчик, кэш или оценка), и COUNT(*) не
+    выполняется; без count поведение как у Paginator. count нужен только
+    для номера последней страницы: номер страницы по нему сверху не
+    ограничивается, поэтому страницы за отставшим count доступны. Окно
+    page_window — крайние on_ends страниц и on_each_side соседей
+    текущей, пропуски обозначены None; оно не зависит от числа страниц,
+    и шаблону не нужно обходить весь page_range.
+    """
+
+    def __init__(self, object_list, per_page, count=None, on_each_side=2,
+                 on_ends=1, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.count = count
+        self.on_each_side = on_each_side
+        self.on_ends = on_ends
+
+    def page_window(self, number, last=None):
+        last = last or self.num_pages
+        shown = set(range(1, min(self.on_ends, last) + 1))
+        shown.update(range(max(last - self.on_ends + 1, 1), last + 1))
+        shown.update(range(
+            max(number - self.on_each_side, 1),
+            min(number + self.on_each_side, last) + 1,
+        ))
+        window = []
+        for page in sorted(shown):
+            if window and page - window[-1] > 1:
+                window.append(None)
+            window.append(page)
+        return window
+
+    def validate_number(self, number):
+        # Как у Paginator, но без проверки сверху по count.
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger("Номер страницы не целое число")
+        if number < 1:
+            raise EmptyPage("Номер страницы меньше 1")
+        return number
+
+    def _rows(self, number):
+        bottom = (number - 1) * self.per_page
+        return list(self.object_list[bottom:bottom + self.per_page + 1])
+
+    def page(self, number):
+        number = self.validate_number(number)
+        rows = self._rows(number)
+        if not rows and number > 1:
+            # За концом данных: последняя настоящая страница по точному
+            # числу (count мог оказаться завышен).
+            self.__dict__.pop("count", None)
+            self.__dict__.pop("num_pages", None)
+            number = self.num_pages
+            rows = self._rows(number)
+        return self._counted_page(
+            rows[:self.per_page], number, len(rows) > self.per_page
+        )
+
+    def _counted_page(self, rows, number, more):
+        # Page выводит has_next и номер последней страницы из count, а
+        # готовый count может отставать: здесь их решает лишняя строка.
+        # Класс страницы остаётся Page, методы подменяются у экземпляра.
+        page = Page(rows, number, self)
+        page.more = more
+        page.last_number = max(self.num_pages, number + int(more))
+        page.page_window = self.page_window(number, page.last_number)
+        page.has_next = lambda: more
+        if rows:
+            page.end_index = lambda: page.start_index() + len(rows) - 1
+        else:
+            # Пустой список: как у Page при count == 0, даже если
+            # переданный count ещё помнит строки.
+            page.start_index = lambda: 0
+            page.end_index = lambda: 0
+
+        def next_page_number():
+            if not more:
+                raise EmptyPage("Следующей страницы нет")
+            return number + 1
+
+        page.next_page_number = next_page_number
+        return page
+
+
+def sqlite_row_estimate(model):
+    """Число строк таблицы из sqlite_stat1 (его заполняет ANALYZE).
+
+    Возвращает None, если база не SQLite или статистики нет.
+    """
+    connection = connections[router.db_for_read(model)]
+    if connection.vendor != "sqlite":
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1",
+                [model._meta.db_table],
+            )
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    return int(row[0].split()[0]) if row else None
+
+
+def _store_count(name, stamp, queryset, timeout):
+    with use_primary():
+        count = queryset.count()
+    cache.set_many(
+        {f"count:{name}:{stamp}": count, f"count:{name}:latest": count},
+        timeout,
+    )
+    return count
+
+
+def cached_count(name, namespaces, queryset, estimate=None,
+                 timeout=count_timeout):
+    """Число объектов queryset без COUNT(*) на каждый запрос.
+
+    Точное значение хранится в кэше до смены версий namespaces. После
+    смены отдаётся прежнее значение (или estimate(), если прежнего нет),
+    а пересчёт уходит в фоновый пул, один на версию. COUNT(*) в самом
+    запросе выполняется, только когда значение взять неоткуда.
+    """
+    stamp = version_stamp(*namespaces)
+    key, latest = f"count:{name}:{stamp}", f"count:{name}:latest"
+    found = cache.get_many([key, latest])
+    if key in found:
+        return found[key]
+    stale = found.get(latest)
+    if stale is None and estimate is not None:
+        stale = estimate()
+    if stale is None:
+        return _store_count(name, stamp, queryset, timeout)
+    if cache.add(f"{key}:refresh", True, count_refresh_timeout):
+        background.submit(_store_count, name, stamp, queryset, timeout)
+    return stale
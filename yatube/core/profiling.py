@@ -0,0 +1,223 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache.backends.base import BaseCache
+from django.template.base import Template
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger("yatube.perf")
+
+_current: ContextVar = ContextVar("request_metrics", default=None)
+_missing = object()
+_installed: bool = False
+
+
+class RequestMetrics:
+    """Счётчики и таймеры одного запроса (время в миллисекундах)."""
+
+    def __init__(self):
+        self.timings = {"db": 0.0, "template": 0.0, "thumbnail": 0.0}
+        self.counts = {
+            "db": 0, "cache_hits": 0, "cache_misses": 0, "thumbnail": 0,
+        }
+        self._depth = {}
+
+    @contextmanager
+    def section(self, name):
+        """Добавляет время блока к timings[name].
+
+        Вложенные секции с тем же именем (include внутри шаблона) не
+        считаются повторно.
+        """
+        depth = self._depth.get(name, 0)
+        self._depth[name] = depth + 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth[name] = depth
+            if not depth:
+                self.timings[name] += (time.perf_counter() - start) * 1000
+
+    def query_wrapper(self, execute, sql, params, many, context):
+        self.counts["db"] += 1
+        with self.section("db"):
+            return execute(sql, params, many, context)
+
+    def record(self, view_name, method, status, wall):
+        return {
+            "view": view_name,
+            "method": method,
+            "status": status,
+            "wall_ms": round(wall, 2),
+            "db_queries": self.counts["db"],
+            "db_ms": round(self.timings["db"], 2),
+            "template_ms": round(self.timings["template"], 2),
+            "cache_hits": self.counts["cache_hits"],
+            "cache_misses": self.counts["cache_misses"],
+            "thumbnails": self.counts["thumbnail"],
+            "thumbnail_ms": round(self.timings["thumbnail"], 2),
+        }
+
+    def server_timing(self, wall):
+        return ", ".join((
+            f'db;dur={self.timings["db"]:.1f};'
+            f'desc="{self.counts["db"]} queries"',
+            f'tpl;dur={self.timings["template"]:.1f}',
+            f'cache;desc="hits={self.counts["cache_hits"]} '
+            f'misses={self.counts["cache_misses"]}"',
+            f'thumb;dur={self.timings["thumbnail"]:.1f}',
+            f"total;dur={wall:.1f}",
+        ))
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def collecting(metrics):
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def section(name):
+    metrics = current()
+    if metrics is None:
+        yield
+        return
+    metrics.counts[name] = metrics.counts.get(name, 0) + 1
+    with metrics.section(name):
+        yield
+
+
+class Aggregates:
+    """Суммы метрик по имени URL за период между выгрузками в лог."""
+    fields: tuple = (
+        "wall_ms", "db_queries", "db_ms", "template_ms", "cache_hits",
+        "cache_misses", "thumbnails", "thumbnail_ms",
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_view = {}
+        self._since = time.monotonic()
+
+    def add(self, record):
+        with self._lock:
+            totals = self._by_view.setdefault(
+                record["view"], dict.fromkeys(("requests", "max_wall_ms")
+                                              + self.fields, 0)
+            )
+            totals["requests"] += 1
+            totals["max_wall_ms"] = max(
+                totals["max_wall_ms"], record["wall_ms"]
+            )
+            for field in self.fields:
+                totals[field] += record[field]
+
+    def snapshot(self, reset=False):
+        """Сводка от самых дорогих по суммарному времени URL к дешёвым."""
+        with self._lock:
+            by_view, self._since = self._by_view, time.monotonic()
+            if reset:
+                self._by_view = {}
+        summary = []
+        for view, totals in by_view.items():
+            requests = totals["requests"]
+            summary.append({
+                "view": view,
+                "requests": requests,
+                "total_wall_ms": round(totals["wall_ms"], 2),
+                "max_wall_ms": totals["max_wall_ms"],
+                **{
+                    f"avg_{field}": round(totals[field] / requests, 2)
+                    for field in self.fields
+                },
+            })
+        return sorted(summary, key=lambda row: -row["total_wall_ms"])
+
+    def maybe_dump(self, interval):
+        if time.monotonic() - self._since < interval:
+            return
+        logger.info(json.dumps(
+            {"perf_aggregates": self.snapshot(reset=True)},
+            ensure_ascii=False,
+        ))
+
+
+aggregates = Aggregates()
+
+
+def _timed_render(render):
+    def wrapper(self, context):
+        with section("template"):
+            return render(self, context)
+    wrapper.__wrapped__ = render
+    return wrapper
+
+
+def _counted_get(get):
+    def wrapper(self, key, default=None, version=None, **kwargs):
+        value = get(self, key, _missing, version=version, **kwargs)
+        metrics = current()
+        if metrics is not None:
+            name = "cache_misses" if value is _missing else "cache_hits"
+            metrics.counts[name] += 1
+        return default if value is _missing else value
+    wrapper.__wrapped__ = get
+    return wrapper
+
+
+def _counted_get_many(get_many):
+    def wrapper(self, keys, version=None, **kwargs):
+        keys = list(keys)
+        found = get_many(self, keys, version=version, **kwargs)
+        metrics = current()
+        if metrics is not None:
+            metrics.counts["cache_hits"] += len(found)
+            metrics.counts["cache_misses"] += len(keys) - len(found)
+        return found
+    wrapper.__wrapped__ = get_many
+    return wrapper
+
+
+def _timed_thumbnail(create):
+    def wrapper(self, *args, **kwargs):
+        with section("thumbnail"):
+            return create(self, *args, **kwargs)
+    wrapper.__wrapped__ = create
+    return wrapper
+
+
+def install():
+    """Оборачивает рендер шаблонов, чтения кэша и генерацию миниатюр.
+
+    Обёртки ставятся один раз на процесс и вне запроса с метриками
+    ничего не делают. Кэш считается на бэкенде "default": NearCache сам
+    ходит в "shared", и обращение не должно учитываться дважды.
+    """
+    global _installed
+    if _installed:
+        return
+    from sorl.thumbnail.base import ThumbnailBackend
+
+    Template.render = _timed_render(Template.render)
+    backend = import_string(settings.CACHES["default"]["BACKEND"])
+    backend.get = _counted_get(backend.get)
+    if backend.get_many is not BaseCache.get_many:
+        # BaseCache.get_many читает через self.get, он уже посчитан.
+        backend.get_many = _counted_get_many(backend.get_many)
+    ThumbnailBackend._create_thumbnail = _timed_thumbnail(
+        ThumbnailBackend._create_thumbnail
+    )
+    _installed = True
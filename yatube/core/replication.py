@@ -0,0 +1,43 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def _replica_files():
+    primary = connections[DEFAULT_DB_ALIAS]
+    for alias in settings.DATABASE_REPLICAS:
+        replica = connections[alias]
+        if replica.vendor != "sqlite" or primary.vendor != "sqlite":
+            raise ImproperlyConfigured(
+                "Копирование реплик поддерживается только для SQLite."
+            )
+        name = replica.settings_dict["NAME"]
+        # В тестах реплики — зеркала default (TEST MIRROR).
+        if name != primary.settings_dict["NAME"]:
+            yield name
+
+
+def copy_database(name, alias=DEFAULT_DB_ALIAS):
+    """Делает файл name точной копией SQLite-базы alias."""
+    source = connections[alias]
+    source.ensure_connection()
+    target = sqlite3.connect(name)
+    try:
+        source.connection.backup(target)
+    finally:
+        target.close()
+
+
+def sync_replicas():
+    """Копирует основную SQLite-базу в файлы реплик через backup API.
+
+    Это локальная замена настоящей репликации: в разработке и тестах она
+    держит файлы реплик в актуальном состоянии. Возвращает число
+    обновлённых реплик.
+    """
+    names = list(_replica_files())
+    for name in names:
+        copy_database(name)
+    return len(names)
@@ -0,0 +1,82 @@
+import logging
+import os
+import time
+
+from django.template import Template, TemplateSyntaxError, engines
+
+logger = logging.getLogger(__name__)
+
+cnt_slowest: int = 5
+
+
+def django_engine():
+    return engines["django"].engine
+
+
+def template_names(engine=None):
+    """Имена всех шаблонов из DIRS движка (каталог templates/ проекта)."""
+    engine = engine or django_engine()
+    names = {}
+    for directory in engine.dirs:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if not filename.endswith((".html", ".txt")):
+                    continue
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, directory).replace(os.sep, "/")
+                names.setdefault(name, path)
+    return dict(sorted(names.items()))
+
+
+def _timed(compile_template):
+    start = time.perf_counter()
+    try:
+        compile_template()
+    except TemplateSyntaxError as error:
+        return (time.perf_counter() - start) * 1000, str(error)
+    return (time.perf_counter() - start) * 1000, None
+
+
+def compile_times(engine=None):
+    """Время компиляции каждого шаблона в мс, от медленных к быстрым.
+
+    Шаблон компилируется из исходника мимо загрузчиков, поэтому время
+    честное и при уже заполненном cached.Loader. Возвращает список
+    (имя, мс, текст ошибки или None).
+    """
+    engine = engine or django_engine()
+    timings = []
+    for name, path in template_names(engine).items():
+        with open(path, encoding=engine.file_charset) as source:
+            text = source.read()
+        elapsed, error = _timed(
+            lambda: Template(text, engine=engine, name=name)
+        )
+        timings.append((name, elapsed, error))
+    return sorted(timings, key=lambda row: -row[1])
+
+
+def warm_up(engine=None):
+    """Загружает все шаблоны через get_template.
+
+    С cached.Loader скомпилированные шаблоны остаются в памяти воркера,
+    и первые запросы после деплоя не платят за разбор base.html и
+    includes. Итог и самые медленные шаблоны пишутся в лог.
+    """
+    engine = engine or django_engine()
+    timings = []
+    for name in template_names(engine):
+        elapsed, error = _timed(lambda: engine.get_template(name))
+        if error:
+            logger.error("Шаблон %s не компилируется: %s", name, error)
+        timings.append((name, elapsed))
+    timings.sort(key=lambda row: -row[1])
+    logger.info(
+        "Прогрето шаблонов: %s за %.1f мс; самые медленные: %s",
+        len(timings), sum(elapsed for _, elapsed in timings),
+        ", ".join(
+            f"{name} {elapsed:.1f} мс"
+            for name, elapsed in timings[:cnt_slowest]
+        ),
+    )
+    return timings
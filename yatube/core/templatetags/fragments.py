@@ -0,0 +1,53 @@
+import hashlib
+
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+# Фрагменты анонимов в памяти процесса: при cached.Loader шаблоны в нём
+# и так не меняются, а поход в кэш для них не нужен.
+_anonymous: dict = {}
+
+
+def _fragment_key(template_name, view_name, username, extra):
+    raw = "|".join([template_name, view_name, username, repr(extra)])
+    return f"fragment:{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+@register.simple_tag(takes_context=True)
+def cached_include(context, template_name, **extra):
+    """{% include %} для общей обвязки страниц, закэшированный по входам.
+
+    Вывод header.html и switcher.html зависит только от имени view,
+    того, вошёл ли пользователь, его username и аргументов тега, поэтому
+    фрагмент рендерится один раз на такой набор. Шаблону доступны
+    request, user и аргументы тега.
+    """
+    request = context.get("request")
+    user = context.get("user")
+    match = request.resolver_match if request is not None else None
+    view_name = match.view_name if match else ""
+    authenticated = user is not None and user.is_authenticated
+
+    def render():
+        return render_to_string(
+            template_name, {"request": request, "user": user, **extra}
+        )
+
+    inputs = (template_name, view_name, tuple(sorted(extra.items())))
+    if not authenticated and settings.TEMPLATE_PRODUCTION:
+        if inputs not in _anonymous:
+            _anonymous[inputs] = render()
+        return mark_safe(_anonymous[inputs])
+    key = _fragment_key(
+        *inputs[:2], user.get_username() if authenticated else "", inputs[2]
+    )
+    html = cache.get(key)
+    if html is None:
+        html = render()
+        cache.set(key, html, settings.FRAGMENT_CACHE_TIMEOUT)
+    return mark_safe(html)
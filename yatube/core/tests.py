@@ -1,6 +1,43 @@
-from django.test import TestCase
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+from django.urls import resolve
 from http import HTTPStatus
 
+from .cache_backends import (FallbackCache, NearCache, cache_settings,
+                             near_exclude)
+from .caching import (anonymous_page_key, lock_key,
+                      stampede_safe_cache_page, versioned_cache_page,
+                      versioned_stream)
+from .db_routers import ReplicaRouter, use_primary
+from .versions import bump_version
+from .middleware import (AnonymousPageCacheMiddleware,
+                         ReplicaPinningMiddleware, pin_cookie)
+from .paginators import CountedPaginator, cached_count, sqlite_row_estimate
+from .profiling import aggregates
+from .replication import copy_database
+from .signals import apply_sqlite_pragmas
+from .template_cache import django_engine, template_names, warm_up
+from .templatetags import fragments
+
+User = get_user_model()
+
 
 class CoreViewTests(TestCase):
     def test_custom_404_page(self):
@@ -8,3 +45,607 @@ class CoreViewTests(TestCase):
         response = self.client.get("/owls/")
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertTemplateUsed(response, "core/404.html")
+
+
+@override_settings(CACHES={
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "shared": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "near-cache-tests",
+    },
+})
+class NearCacheTests(TestCase):
+    def setUp(self):
+        self.near = NearCache("shared", {
+            "OPTIONS": {
+                "MAX_ENTRIES": 2,
+                "NEAR_TIMEOUT": 60,
+                "NEAR_EXCLUDE": near_exclude,
+            },
+        })
+        self.shared = caches["shared"]
+        self.shared.clear()
+
+    def test_hot_keys_served_locally(self):
+        """Горячий ключ читается из памяти процесса."""
+        self.near.set("index", "page")
+        self.shared.delete("index")
+        self.assertEqual(self.near.get("index"), "page")
+        self.assertEqual(self.near.get_many(["index"]), {"index": "page"})
+
+    def test_writes_go_to_shared_tier(self):
+        """Запись и удаление доходят до общего кэша."""
+        self.near.set("index", "page")
+        self.assertEqual(self.shared.get("index"), "page")
+        self.near.delete("index")
+        self.assertIsNone(self.near.get("index"))
+
+    def test_excluded_prefix_bypasses_local_copy(self):
+        """Версии всегда читаются из общего кэша."""
+        self.near.set("version:posts", 1)
+        self.shared.incr("version:posts")
+        self.assertEqual(self.near.get("version:posts"), 2)
+
+    def test_locks_and_stale_pages_bypass_local_copy(self):
+        """Блокировки и записи страниц без версии общие для воркеров."""
+        for key in (lock_key("page"), "stale_page:index", "anon_page:index"):
+            with self.subTest(key=key):
+                self.near.set(key, "old")
+                self.shared.set(key, "new")
+                self.assertEqual(self.near.get(key), "new")
+
+    def test_lru_eviction(self):
+        """Локальный уровень ограничен MAX_ENTRIES."""
+        for key in ("a", "b", "c"):
+            self.near.set(key, key)
+        self.shared.clear()
+        self.assertIsNone(self.near.get("a"))
+        self.assertEqual(self.near.get("c"), "c")
+
+    def test_local_copy_is_isolated(self):
+        """Изменение полученного объекта не портит закэшированный."""
+        self.near.set("list", [1])
+        self.near.get("list").append(2)
+        self.assertEqual(self.near.get("list"), [1])
+
+
+class CacheSettingsTests(TestCase):
+    def test_without_url_uses_locmem(self):
+        """Без адреса общий кэш не настраивается."""
+        config = cache_settings("", fallback_dir="/tmp/yatube-cache")
+        self.assertEqual(list(config), ["default"])
+
+    def test_server_choice_is_made_at_runtime(self):
+        """Адрес сервера превращается в FallbackCache, а не в выбор."""
+        with mock.patch("core.cache_backends.find_spec", return_value=True):
+            config = cache_settings(
+                "redis://127.0.0.1:1/0", fallback_dir="/tmp/yatube-cache"
+            )
+        self.assertEqual(
+            config["shared"]["BACKEND"], "core.cache_backends.FallbackCache"
+        )
+        self.assertEqual(config["shared"]["LOCATION"], "/tmp/yatube-cache")
+        self.assertEqual(
+            config["default"]["BACKEND"], "core.cache_backends.NearCache"
+        )
+
+    def test_missing_client_fails_loudly(self):
+        """Без пакета клиента настройки не загружаются."""
+        with mock.patch("core.cache_backends.find_spec", return_value=None):
+            with self.assertRaises(ImproperlyConfigured):
+                cache_settings(
+                    "memcached://127.0.0.1:1", fallback_dir="/tmp/yatube-cache"
+                )
+
+
+class FallbackCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.cache = FallbackCache(self.directory.name, {
+            "OPTIONS": {
+                "PRIMARY": {
+                    "BACKEND":
+                        "django.core.cache.backends.locmem.LocMemCache",
+                    "LOCATION": "fallback-tests",
+                },
+                "RETRY_INTERVAL": 60,
+            },
+        })
+        self.cache.set("index", "primary")
+        self.primary = self.cache._primary
+
+    def test_primary_used_while_available(self):
+        """Пока сервер отвечает, файловый кэш не используется."""
+        self.assertEqual(self.primary.get("index"), "primary")
+        self.assertIsNone(self.cache._fallback.get("index"))
+
+    def test_unavailable_server_falls_back_with_warning(self):
+        """Ошибка сервера пишется в лог, запросы уходят в файлы."""
+        self.cache._fallback.set("index", "file")
+        with mock.patch.object(self.primary, "get",
+                               side_effect=ConnectionError) as get:
+            with self.assertLogs("core.cache_backends", "WARNING"):
+                self.assertEqual(self.cache.get("index"), "file")
+            self.assertEqual(self.cache.get("index"), "file")
+        self.assertEqual(get.call_count, 1)
+
+    def test_primary_retried_after_interval(self):
+        """После паузы воркер снова пробует сервер."""
+        with mock.patch.object(self.primary, "get", side_effect=OSError):
+            with self.assertLogs("core.cache_backends", "WARNING"):
+                self.cache.get("index")
+        self.cache._down_until = 0.0
+        self.assertEqual(self.cache.get("index"), "primary")
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"])
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def read_alias(self, request):
+        def view(request):
+            return HttpResponse(self.router.db_for_read(User))
+        middleware = ReplicaPinningMiddleware(view)
+        response = middleware(request)
+        return response.content.decode(), response
+
+    def test_reads_go_to_replica(self):
+        """Чтения идут в реплику, записи и use_primary — в default."""
+        self.assertEqual(self.router.db_for_read(User), "replica1")
+        self.assertEqual(self.router.db_for_write(User), "default")
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(User), "default")
+
+    def test_write_pins_session_to_primary(self):
+        """После записи GET этого браузера читают из default."""
+        alias, _ = self.read_alias(self.factory.get("/"))
+        self.assertEqual(alias, "replica1")
+        alias, response = self.read_alias(self.factory.post("/"))
+        self.assertEqual(alias, "default")
+        request = self.factory.get("/")
+        request.COOKIES[pin_cookie] = response.cookies[pin_cookie].value
+        alias, _ = self.read_alias(request)
+        self.assertEqual(alias, "default")
+
+    def test_cache_fills_read_primary(self):
+        """То, что ляжет в кэш под новой версией, читается из default.
+
+        Иначе отставшая реплика отдала бы старые данные, и они жили бы в
+        кэше до следующей смены версии.
+        """
+        caches["default"].clear()
+
+        def view(request):
+            return HttpResponse(self.router.db_for_read(User))
+
+        request = self.factory.get("/about/author/")
+        request.user = AnonymousUser()
+        for decorator in (versioned_cache_page, stampede_safe_cache_page):
+            with self.subTest(decorator=decorator.__name__):
+                cached = decorator(
+                    60, decorator.__name__, lambda request: ["lagging"]
+                )(view)
+                self.assertEqual(cached(request).content, b"default")
+        stream = versioned_stream(
+            request, "stream", ["lagging"], "text/plain",
+            lambda: (
+                self.router.db_for_read(User).encode() for _ in range(2)
+            ),
+            60,
+        )
+        self.assertEqual(
+            b"".join(stream.streaming_content), b"defaultdefault"
+        )
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = AnonymousPageCacheMiddleware(get_response)
+        request.resolver_match = resolve(request.path)
+        self.assertEqual(middleware(request).content, b"default")
+        self.assertEqual(self.router.db_for_read(User), "replica1")
+
+    def test_expired_pin_reads_replica(self):
+        """Просроченная или битая cookie не закрепляет чтения."""
+        for value in ("0", "не число"):
+            with self.subTest(value=value):
+                request = self.factory.get("/")
+                request.COOKIES[pin_cookie] = value
+                alias, _ = self.read_alias(request)
+                self.assertEqual(alias, "replica1")
+
+
+class ReplicationShimTests(TransactionTestCase):
+    def test_copy_database(self):
+        """Файл реплики после копирования видит новые строки."""
+        User.objects.create(username="replicated")
+        with tempfile.TemporaryDirectory() as directory:
+            name = os.path.join(directory, "replica.sqlite3")
+            copy_database(name)
+            replica = sqlite3.connect(name)
+            try:
+                rows = replica.execute(
+                    "SELECT username FROM auth_user"
+                ).fetchall()
+            finally:
+                replica.close()
+        self.assertEqual(rows, [("replicated",)])
+
+
+class SqlitePragmasTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_to_connection(self):
+        """Прагмы из SQLITE_PRAGMAS применяются к соединению."""
+        with override_settings(SQLITE_PRAGMAS={
+            "cache_size": -2048, "busy_timeout": 1234,
+        }):
+            apply_sqlite_pragmas(sender=None, connection=connection)
+        self.assertEqual(self.pragma("cache_size"), -2048)
+        self.assertEqual(self.pragma("busy_timeout"), 1234)
+
+    def test_no_pragmas_by_default(self):
+        """Без производственного профиля соединение не меняется."""
+        before = self.pragma("cache_size")
+        with override_settings(SQLITE_PRAGMAS={}):
+            apply_sqlite_pragmas(sender=None, connection=connection)
+        self.assertEqual(self.pragma("cache_size"), before)
+
+
+@override_settings(PERF_INSTRUMENTATION=True, PERF_DUMP_INTERVAL=3600)
+class PerformanceMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create(username="writer")
+        author.posts.create(text="Пост для замера")
+
+    def setUp(self):
+        caches["default"].clear()
+        aggregates.snapshot(reset=True)
+
+    def test_server_timing_and_log(self):
+        """Метрики запроса попадают в Server-Timing и в лог."""
+        with self.assertLogs("yatube.perf", "INFO") as logs:
+            response = self.client.get("/")
+        timing = response["Server-Timing"]
+        for metric in ("db;dur=", "tpl;dur=", "cache;desc=", "total;dur="):
+            self.assertIn(metric, timing)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["view"], "posts:index")
+        self.assertGreater(record["db_queries"], 0)
+        self.assertGreater(record["template_ms"], 0)
+        self.assertGreater(record["cache_misses"], 0)
+
+    def test_aggregates_by_url_name(self):
+        """Сводка копится по имени URL и видит попадания в кэш."""
+        with self.assertLogs("yatube.perf", "INFO"):
+            for _ in range(3):
+                self.client.get("/")
+        summary = {row["view"]: row for row in aggregates.snapshot()}
+        self.assertEqual(summary["posts:index"]["requests"], 3)
+        self.assertGreater(summary["posts:index"]["avg_cache_hits"], 0)
+
+    @override_settings(PERF_INSTRUMENTATION=False)
+    def test_disabled_by_default(self):
+        """Без настройки заголовка нет."""
+        self.assertNotIn("Server-Timing", self.client.get("/"))
+
+
+class CountedPaginatorTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+
+    def test_window_does_not_list_every_page(self):
+        """Окно: первая, последняя и соседи текущей, пропуски — None."""
+        paginator = CountedPaginator(range(10 ** 6), 10, count=10 ** 6)
+        self.assertEqual(
+            paginator.page_window(500),
+            [1, None, 498, 499, 500, 501, 502, None, 100000],
+        )
+        self.assertEqual(paginator.page_window(2), [1, 2, 3, 4, None, 100000])
+        self.assertEqual(
+            CountedPaginator(range(30), 10).get_page(1).page_window,
+            [1, 2, 3],
+        )
+
+    def test_stale_count_does_not_cut_page(self):
+        """Отставший count не обрезает последнюю страницу."""
+        page = CountedPaginator(list(range(25)), 10, count=12).get_page(2)
+        self.assertEqual(len(page), 10)
+
+    def test_pages_beyond_stale_count(self):
+        """Страницы за отставшим count открываются, has_next — по данным."""
+        paginator = CountedPaginator(list(range(25)), 10, count=10)
+        first = paginator.get_page(1)
+        self.assertTrue(first.has_next())
+        self.assertEqual(first.page_window, [1, 2])
+        second = paginator.get_page(2)
+        self.assertEqual(second.number, 2)
+        self.assertEqual(list(second), list(range(10, 20)))
+        self.assertEqual(second.next_page_number(), 3)
+        third = paginator.get_page(3)
+        self.assertEqual(list(third), list(range(20, 25)))
+        self.assertFalse(third.has_next())
+
+    def test_page_past_data_falls_back_to_last(self):
+        """Номер за концом данных даёт последнюю настоящую страницу."""
+        paginator = CountedPaginator(list(range(25)), 10, count=100)
+        page = paginator.get_page(9)
+        self.assertEqual(page.number, 3)
+        self.assertEqual(list(page), list(range(20, 25)))
+
+    def test_empty_listing_indexes(self):
+        """Пустой список даёт индексы 0, как Page при count == 0."""
+        for count in (None, 0, 3):
+            with self.subTest(count=count):
+                page = CountedPaginator([], 10, count=count).get_page(1)
+                self.assertEqual(page.start_index(), 0)
+                self.assertEqual(page.end_index(), 0)
+        page = CountedPaginator(list(range(25)), 10).get_page(3)
+        self.assertEqual((page.start_index(), page.end_index()), (21, 25))
+
+    @override_settings(BACKGROUND_WORKERS=0)
+    def test_cached_count_serves_stale_and_refreshes(self):
+        """После смены версии отдаётся прежнее число, пересчёт — фоном."""
+        User.objects.create(username="first")
+        queryset = User.objects.all()
+        self.assertEqual(cached_count("users", ["users"], queryset), 1)
+        User.objects.create(username="second")
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_count("users", ["users"], queryset), 1)
+        bump_version("users")
+        with self.assertNumQueries(1):
+            self.assertEqual(cached_count("users", ["users"], queryset), 1)
+        self.assertEqual(cached_count("users", ["users"], queryset), 2)
+
+    def test_sqlite_row_estimate(self):
+        """Оценка числа строк берётся из sqlite_stat1 после ANALYZE."""
+        if connection.vendor != "sqlite":
+            self.skipTest("sqlite_stat1 есть только в SQLite")
+        User.objects.bulk_create(
+            [User(username=f"user{number}") for number in range(5)]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE auth_user")
+        self.assertEqual(sqlite_row_estimate(User), 5)
+
+
+class TemplateCacheTests(SimpleTestCase):
+    def test_compile_templates_reports_every_template(self):
+        """Команда показывает время компиляции каждого шаблона."""
+        out = StringIO()
+        call_command("compile_templates", stdout=out)
+        output = out.getvalue()
+        for name in ("base.html", "posts/index.html", "includes/header.html"):
+            self.assertIn(name, output)
+        self.assertIn(f"Шаблонов: {len(template_names())}", output)
+
+    def test_compile_templates_fails_on_broken_template(self):
+        """Ошибка компиляции шаблона даёт ненулевой код выхода."""
+        timings = [("broken.html", 1.0, "Invalid block tag"),
+                   ("base.html", 0.5, None)]
+        with mock.patch(
+            "core.management.commands.compile_templates.compile_times",
+            return_value=timings,
+        ):
+            with self.assertRaisesMessage(CommandError, "broken.html"):
+                call_command("compile_templates", stdout=StringIO())
+
+    @override_settings(TEMPLATES=[{
+        **settings.TEMPLATES[0],
+        "APP_DIRS": False,
+        "OPTIONS": {
+            **settings.TEMPLATES[0]["OPTIONS"],
+            "loaders": [(
+                "django.template.loaders.cached.Loader",
+                settings.TEMPLATE_LOADERS,
+            )],
+        },
+    }])
+    def test_warm_up_fills_cached_loader(self):
+        """После прогрева шаблоны берутся из памяти cached.Loader."""
+        with self.assertLogs("core.template_cache", "INFO"):
+            warm_up()
+        loader = django_engine().template_loaders[0]
+        self.assertIn("base.html", loader.get_template_cache)
+        self.assertIn("posts/index.html", loader.get_template_cache)
+
+
+class CachedIncludeTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.first = User.objects.create(username="first")
+        cls.second = User.objects.create(username="second")
+
+    def setUp(self):
+        caches["default"].clear()
+        fragments._anonymous.clear()
+        patcher = mock.patch.object(
+            fragments, "render_to_string", wraps=fragments.render_to_string
+        )
+        self.render = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def header_renders(self):
+        return [
+            call for call in self.render.call_args_list
+            if call.args[0] == "includes/header.html"
+        ]
+
+    def test_header_rendered_once_per_inputs(self):
+        """Шапка рендерится один раз на view, вход и пользователя."""
+        self.client.get("/about/author/")
+        self.client.get("/about/author/")
+        self.assertEqual(len(self.header_renders()), 1)
+        response = self.client.get("/about/tech/")
+        self.assertEqual(len(self.header_renders()), 2)
+        self.assertContains(response, "Войти")
+
+    def test_users_do_not_share_header(self):
+        """Каждый пользователь видит в шапке своё имя."""
+        for user in (self.first, self.second):
+            with self.subTest(user=user.username):
+                self.client.force_login(user)
+                response = self.client.get("/about/author/")
+                self.assertContains(response, f"Пользователь: {user}")
+        self.assertEqual(len(self.header_renders()), 2)
+
+    @override_settings(TEMPLATE_PRODUCTION=True)
+    def test_anonymous_header_from_process_memory(self):
+        """Шапка анонимов в боевом профиле не ходит в кэш."""
+        # С cookie страница целиком не кэшируется и рендерится заново.
+        self.client.cookies["seen"] = "1"
+        self.client.get("/about/author/")
+        with mock.patch.object(fragments.cache, "get") as cache_get:
+            response = self.client.get("/about/author/")
+        cache_get.assert_not_called()
+        self.assertContains(response, "Регистрация")
+        self.assertEqual(len(self.header_renders()), 1)
+
+    def test_error_page_uses_cached_header(self):
+        """Страница 404 тоже берёт шапку из кэша."""
+        self.client.get("/owls/")
+        self.client.get("/owls/")
+        self.assertEqual(len(self.header_renders()), 1)
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username="writer")
+        cls.author.posts.create(text="Первый пост")
+        cls.profile = f"/profile/{cls.author.username}/"
+
+    def setUp(self):
+        caches["default"].clear()
+
+    def test_repeat_get_served_from_cache(self):
+        """Повторный анонимный GET без cookie не рендерит шаблон."""
+        self.assertTrue(self.client.get("/about/author/").templates)
+        response = self.client.get("/about/author/")
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.templates, [])
+
+    def test_cached_page_varies_on_cookie(self):
+        """И первый, и закэшированный ответ несут Vary: Cookie."""
+        for page in ("/", self.profile):
+            with self.subTest(page=page):
+                first = self.client.get(page)
+                self.assertIn("Cookie", first.get("Vary", ""))
+                cached = self.client.get(page)
+                self.assertEqual(cached.templates, [])
+                self.assertIn("Cookie", cached.get("Vary", ""))
+
+    def test_cookie_or_login_bypass_cache(self):
+        """С cookie или после входа страница рендерится заново."""
+        self.client.get("/about/author/")
+        self.client.cookies["seen"] = "1"
+        self.assertTrue(self.client.get("/about/author/").templates)
+        self.client.force_login(self.author)
+        self.assertTrue(self.client.get("/about/author/").templates)
+
+    def test_page_parameter_keys(self):
+        """page=1, мусор в page и лишние параметры дают один ключ."""
+        factory = RequestFactory()
+        params = ("page", "cursor")
+
+        def key(query):
+            return anonymous_page_key(
+                factory.get("/", query), "posts:index", params
+            )
+
+        first = key({})
+        for query in ({"page": "1"}, {"page": "abc"}, {"utm_source": "x"}):
+            with self.subTest(query=query):
+                self.assertEqual(key(query), first)
+        self.assertEqual(key({"page": "02"}), key({"page": "2"}))
+        self.assertNotEqual(key({"page": "2"}), first)
+
+    def test_new_post_invalidates_page(self):
+        """Новый пост сбрасывает закэшированный профиль."""
+        self.client.get(self.profile)
+        self.author.posts.create(text="Свежий пост")
+        self.assertContains(self.client.get(self.profile), "Свежий пост")
+
+    def test_stale_page_while_refreshing(self):
+        """Пока один запрос перерисовывает страницу, другие получают старую."""
+        self.client.get(self.profile)
+        self.author.posts.create(text="Свежий пост")
+        key = anonymous_page_key(
+            RequestFactory().get(self.profile), "posts:profile",
+            ("page", "cursor"),
+        )
+        caches["default"].add(lock_key(key), True)
+        self.assertNotContains(self.client.get(self.profile), "Свежий пост")
+        caches["default"].delete(lock_key(key))
+        self.assertContains(self.client.get(self.profile), "Свежий пост")
+
+
+class StampedeSafeCachePageTests(SimpleTestCase):
+    cnt_threads: int = 8
+
+    def setUp(self):
+        caches["default"].clear()
+        self.renders = 0
+        self.lock = threading.Lock()
+
+        @stampede_safe_cache_page(60, "stampede", lambda request: ["hot"])
+        def view(request):
+            with self.lock:
+                self.renders += 1
+                number = self.renders
+            time.sleep(0.2)
+            return HttpResponse(f"render {number}")
+
+        self.view = view
+
+    def hit_concurrently(self):
+        barrier = threading.Barrier(self.cnt_threads)
+        bodies = []
+
+        def worker():
+            request = RequestFactory().get("/")
+            request.user = AnonymousUser()
+            barrier.wait()
+            response = self.view(request)
+            with self.lock:
+                bodies.append(response.content.decode())
+
+        threads = [
+            threading.Thread(target=worker) for _ in range(self.cnt_threads)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return bodies
+
+    def test_cold_cache_renders_once(self):
+        """На пустом кэше страницу считает один запрос, остальные ждут."""
+        bodies = self.hit_concurrently()
+        self.assertEqual(self.renders, 1)
+        self.assertEqual(set(bodies), {"render 1"})
+
+    def test_expired_page_renders_once_and_serves_stale(self):
+        """После смены версии пересчёт один, остальные получают старую."""
+        self.hit_concurrently()
+        bump_version("hot")
+        bodies = self.hit_concurrently()
+        self.assertEqual(self.renders, 2)
+        self.assertEqual(bodies.count("render 2"), 1)
+        self.assertEqual(bodies.count("render 1"), self.cnt_threads - 1)
+        self.assertEqual(
+            self.hit_concurrently(), ["render 2"] * self.cnt_threads
+        )
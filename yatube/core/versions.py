@@ -0,0 +1,49 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+
+
+def _key(namespace):
+    # Слаги и имена пользователей могут содержать символы, недопустимые
+    # в ключах memcached.
+    if not namespace.isascii() or not namespace.isprintable() or (
+        " " in namespace
+    ):
+        namespace = hashlib.md5(namespace.encode()).hexdigest()
+    return f"version:{namespace}"
+
+
+def _initial():
+    # Начальная версия — время в миллисекундах: после вытеснения ключа из
+    # кэша новая версия не совпадёт ни с одной из уже использованных.
+    return int(time.time() * 1000)
+
+
+def get_versions(*namespaces):
+    """Текущие версии пространств имён одним запросом к кэшу."""
+    keys = {_key(namespace): namespace for namespace in namespaces}
+    found = cache.get_many(list(keys))
+    versions = {}
+    for key, namespace in keys.items():
+        version = found.get(key)
+        if version is None:
+            cache.add(key, _initial(), None)
+            version = cache.get(key)
+        versions[namespace] = version
+    return versions
+
+
+def version_stamp(*namespaces):
+    """Строка версий для ключа кэша; меняется при любом bump_version."""
+    versions = get_versions(*namespaces)
+    return ".".join(str(versions[namespace]) for namespace in namespaces)
+
+
+def bump_version(*namespaces):
+    """Инвалидирует всё, что закэшировано под этими пространствами имён."""
+    for namespace in namespaces:
+        try:
+            cache.incr(_key(namespace))
+        except ValueError:
+            cache.set(_key(namespace), _initial(), None)
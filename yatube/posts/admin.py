@@ -1,9 +1,35 @@
-from django.contrib import admin
+from django.conf import settings
+from django.contrib import admin, messages
 
+from . import search
 from .models import Group, Post, Comment, Follow
 
 
-class PostAdmin(admin.ModelAdmin):
+class IndexedSearchMixin:
+    """Поиск в админке через поисковый индекс вместо LIKE '%term%'.
+
+    Показывается не больше SEARCH_ADMIN_MAX_RESULTS самых релевантных
+    объектов; если найдено больше, админка об этом предупреждает.
+    """
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        limit = settings.SEARCH_ADMIN_MAX_RESULTS
+        ids = search.search(self.search_kind, search_term, limit=limit + 1)
+        if len(ids) > limit:
+            ids = ids[:limit]
+            messages.warning(
+                request,
+                f"Показаны {limit} самых релевантных результатов, "
+                f"уточните запрос.",
+            )
+        return queryset.filter(pk__in=ids), False
+
+
+class PostAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    search_kind = "post"
     list_display = ("pk", "text", "pub_date", "author", "group")
     list_editable = ("group",)
     search_fields = ("text",)
@@ -11,7 +37,8 @@ class PostAdmin(admin.ModelAdmin):
     empty_value_display = "-пусто-"
 
 
-class GroupAdmin(admin.ModelAdmin):
+class GroupAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    search_kind = "group"
     list_display = ("pk", "title", "slug", "description")
     list_filter = ("title",)
     search_fields = ("title",)
@@ -0,0 +1,279 @@
+import random
+import statistics
+import threading
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import DatabaseError, connection, connections, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from faker import Faker
+
+from . import search
+from .counters import recount_posts, recount_users
+from .models import Comment, Follow, Group, Post, TimelineEntry
+
+User = get_user_model()
+batch_size: int = 500
+small_gif: bytes = (
+    b"\x47\x49\x46\x38\x39\x61\x02\x00"
+    b"\x01\x00\x80\x00\x00\x00\x00\x00"
+    b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
+    b"\x00\x00\x00\x2C\x00\x00\x00\x00"
+    b"\x02\x00\x01\x00\x00\x02\x02\x0C"
+    b"\x0A\x00\x3B"
+)
+benchmark_views: tuple = (
+    "index", "group_posts", "profile", "post_detail", "follow_index",
+)
+
+
+def seed(users=50, groups=5, posts=1000, comments=3000, follows=10,
+         images=0.1, random_seed=0):
+    """Заполняет базу синтетическими данными через bulk_create.
+
+    follows — число подписок на пользователя, images — доля постов с
+    картинкой (один файл на все посты). Сигналы при bulk_create не
+    срабатывают, поэтому счётчики, ленты и поиск пересчитываются в конце.
+    """
+    fake = Faker("ru_RU")
+    fake.seed_instance(random_seed)
+    rnd = random.Random(random_seed)
+    image = ""
+    if images:
+        image = default_storage.save(
+            "posts/benchmark.gif", ContentFile(small_gif)
+        )
+    with transaction.atomic():
+        User.objects.bulk_create(
+            [
+                User(username=f"bench_{i}_{fake.user_name()}"[:150])
+                for i in range(users)
+            ],
+            batch_size=batch_size,
+        )
+        Group.objects.bulk_create(
+            [
+                Group(
+                    title=fake.sentence(nb_words=3)[:200],
+                    slug=f"bench-{i}",
+                    description=fake.paragraph(),
+                )
+                for i in range(groups)
+            ],
+            batch_size=batch_size,
+        )
+        user_ids = list(User.objects.values_list("pk", flat=True))
+        group_ids = list(Group.objects.values_list("pk", flat=True))
+        Post.objects.bulk_create(
+            (
+                Post(
+                    text=fake.paragraph(nb_sentences=5),
+                    author_id=rnd.choice(user_ids),
+                    group_id=rnd.choice(group_ids + [None]),
+                    image=image if rnd.random() < images else "",
+                )
+                for _ in range(posts)
+            ),
+            batch_size=batch_size,
+        )
+        post_ids = list(Post.objects.values_list("pk", flat=True))
+        Comment.objects.bulk_create(
+            (
+                Comment(
+                    post_id=rnd.choice(post_ids),
+                    author_id=rnd.choice(user_ids),
+                    text=fake.sentence(),
+                )
+                for _ in range(comments if post_ids else 0)
+            ),
+            batch_size=batch_size,
+        )
+        Follow.objects.bulk_create(
+            (
+                Follow(user_id=user_id, author_id=author_id)
+                for user_id in user_ids
+                for author_id in rnd.sample(
+                    [pk for pk in user_ids if pk != user_id],
+                    min(follows, len(user_ids) - 1),
+                )
+            ),
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        TimelineEntry.objects.bulk_create(
+            (
+                TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+                for user_id, pk, pub_date in Follow.objects.filter(
+                    author__posts__isnull=False
+                ).values_list(
+                    "user_id", "author__posts", "author__posts__pub_date"
+                ).iterator()
+            ),
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        recount_users()
+        recount_posts()
+    search.rebuild()
+    cache.clear()
+
+
+def _targets():
+    """Адреса и пользователь для каждого замеряемого view."""
+    author = User.objects.filter(counters__posts__gt=0).order_by(
+        "-counters__posts"
+    ).first()
+    group = Group.objects.order_by("pk").first()
+    post = Post.objects.order_by("-comments_count").first()
+    reader = User.objects.order_by("-counters__following").first()
+    return {
+        "index": ("/", None),
+        "group_posts": (f"/group/{group.slug}/", None),
+        "profile": (f"/profile/{author.username}/", None),
+        "post_detail": (f"/posts/{post.pk}/", None),
+        "follow_index": ("/follow/", reader),
+    }
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(share * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def latency(timings):
+    """Перцентили и среднее по списку времён в миллисекундах."""
+    if not timings:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None,
+                "mean_ms": None}
+    return {
+        "p50_ms": round(percentile(timings, 0.5), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "p99_ms": round(percentile(timings, 0.99), 3),
+        "mean_ms": round(statistics.mean(timings), 3),
+    }
+
+
+def _get(client, url):
+    response = client.get(url)
+    if response.status_code != 200:
+        raise RuntimeError(f"{url}: ответ {response.status_code}")
+    return response
+
+
+def measure(client, url, requests=50, cold=False):
+    """Замеряет время, число запросов к БД и пик памяти для одного URL.
+
+    Память снимается отдельным запросом: tracemalloc заметно замедляет
+    интерпретатор и исказил бы перцентили времени.
+    """
+    timings, queries = [], []
+    for _ in range(requests):
+        if cold:
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            _get(client, url)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(captured))
+    if cold:
+        cache.clear()
+    tracemalloc.start()
+    try:
+        _get(client, url)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        "url": url,
+        "requests": requests,
+        **latency(timings),
+        "queries_p50": percentile(queries, 0.5),
+        "queries_max": max(queries),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def run(views=benchmark_views, requests=50, cold=False):
+    """Прогоняет view через тестовый клиент и возвращает отчёт."""
+    targets = _targets()
+    report = {}
+    for name in views:
+        url, user = targets[name]
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        report[name] = measure(client, url, requests, cold)
+    return report
+
+
+def _mixed_worker(kind, user, url, deadline, results):
+    client = Client()
+    if user is not None:
+        client.force_login(user)
+    timings, errors = [], 0
+    try:
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                if kind == "read":
+                    response = client.get(url)
+                else:
+                    response = client.post(url, {"text": "Комментарий"})
+            except DatabaseError:
+                errors += 1
+                continue
+            if response.status_code not in (200, 302):
+                errors += 1
+                continue
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        connections.close_all()
+    results.append((kind, timings, errors))
+
+
+def run_mixed(readers=4, writers=2, duration=5.0):
+    """Смешанная нагрузка: чтение index и запись add_comment из потоков.
+
+    Показывает, как читатели и писатели мешают друг другу на одной базе:
+    пропускную способность, перцентили и число ошибок (например,
+    "database is locked") для каждого вида запросов.
+    """
+    post = Post.objects.order_by("-comments_count").first()
+    users = list(User.objects.order_by("pk")[:writers])
+    comment_url = f"/posts/{post.pk}/comment/"
+    deadline = time.monotonic() + duration
+    results = []
+    threads = [
+        threading.Thread(
+            target=_mixed_worker,
+            args=("read", None, "/", deadline, results),
+        )
+        for _ in range(readers)
+    ] + [
+        threading.Thread(
+            target=_mixed_worker,
+            args=("write", user, comment_url, deadline, results),
+        )
+        for user in users
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report = {}
+    for kind, threads_count in (("read", readers), ("write", len(users))):
+        timings = [t for k, ts, _ in results if k == kind for t in ts]
+        report[kind] = {
+            "threads": threads_count,
+            "requests": len(timings),
+            "per_second": round(len(timings) / duration, 1),
+            "errors": sum(e for k, _, e in results if k == kind),
+            **latency(timings),
+        }
+    return report
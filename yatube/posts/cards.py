@@ -0,0 +1,40 @@
+from core.versions import get_versions
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+card_template: str = "includes/bl_posts.html"
+
+
+def card_namespaces(post):
+    """Пространства версий, от которых зависит карточка поста."""
+    namespaces = [f"post:{post.pk}", f"user:{post.author_id}"]
+    if post.group_id:
+        namespaces.append(f"group:{post.group_id}")
+    return namespaces
+
+
+def render_post_cards(posts):
+    """Карточки постов страницы: кэш читается одним get_many, рендерятся
+    только промахи. Возвращает список пар (post, html)."""
+    posts = list(posts)
+    namespaces = {ns for post in posts for ns in card_namespaces(post)}
+    versions = get_versions(*namespaces)
+    keys = {
+        post.pk: "post_card:{}:{}".format(post.pk, ".".join(
+            str(versions[ns]) for ns in card_namespaces(post)
+        ))
+        for post in posts
+    }
+    cards = cache.get_many(list(keys.values()))
+    missing = {}
+    for post in posts:
+        if keys[post.pk] not in cards:
+            missing[keys[post.pk]] = render_to_string(
+                card_template, {"post": post}
+            )
+    if missing:
+        cache.set_many(missing, settings.POST_CARD_CACHE_TIMEOUT)
+        cards.update(missing)
+    return [(post, mark_safe(cards[keys[post.pk]])) for post in posts]
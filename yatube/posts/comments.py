@@ -0,0 +1,93 @@
+from core.paginators import CursorPaginator
+from django.db import connection
+from django.db.models import F
+
+from .models import Comment, User
+
+cnt_comment_previews: int = 3
+cnt_comments: int = 20
+
+# ROW_NUMBER() есть в SQLite с 3.25, но бэкенд Django 2.2 об этом не
+# знает (supports_over_clause=False), поэтому окно пишется в raw().
+_ranked_sql: str = """
+    SELECT * FROM (
+        SELECT comment.*,
+               author.username AS author_username,
+               ROW_NUMBER() OVER (
+                   PARTITION BY comment.post_id
+                   ORDER BY comment.pub_date DESC, comment.id DESC
+               ) AS position
+        FROM {comments} comment
+        INNER JOIN {users} author ON author.id = comment.author_id
+        WHERE comment.post_id IN ({placeholders})
+    ) ranked
+    WHERE ranked.position <= %s
+    ORDER BY ranked.post_id, ranked.position
+"""
+
+
+def supports_window():
+    if connection.vendor == "sqlite":
+        return connection.Database.sqlite_version_info >= (3, 25, 0)
+    return connection.features.supports_over_clause
+
+
+def latest_comments(post_ids, limit=cnt_comment_previews):
+    """Последние limit комментариев каждого поста одним запросом.
+
+    Возвращает словарь post_id -> список комментариев от новых к старым;
+    у комментариев есть author_username, так что шаблону не нужен
+    запрос за автором.
+    """
+    previews = {pk: [] for pk in post_ids}
+    if not post_ids or limit <= 0:
+        return previews
+    if supports_window():
+        comments = Comment.objects.raw(
+            _ranked_sql.format(
+                comments=connection.ops.quote_name(Comment._meta.db_table),
+                users=connection.ops.quote_name(User._meta.db_table),
+                placeholders=", ".join(["%s"] * len(post_ids)),
+            ),
+            [*post_ids, limit],
+        )
+    else:
+        queryset = Comment.objects.annotate(
+            author_username=F("author__username")
+        )
+        comments = (
+            comment for pk in post_ids
+            for comment in queryset.filter(post_id=pk).order_by(
+                "-pub_date", "-id"
+            )[:limit]
+        )
+    for comment in comments:
+        previews[comment.post_id].append(comment)
+    return previews
+
+
+def attach_comment_previews(posts, limit=cnt_comment_previews):
+    """Кладёт в post.latest_comments превью комментариев страницы.
+
+    Число комментариев берётся из счётчика comments_count; посты без
+    комментариев в запрос не попадают, а если их нет на всей странице,
+    запроса нет вовсе.
+    """
+    posts = list(posts)
+    with_comments = [post.pk for post in posts if post.comments_count]
+    previews = latest_comments(with_comments, limit)
+    for post in posts:
+        post.latest_comments = previews.get(post.pk, [])
+    return posts
+
+
+def comment_page(post_id, cursor, per_page=cnt_comments):
+    """Порция комментариев поста от новых к старым по курсору.
+
+    Страница выбирается диапазоном по индексу (post, -pub_date, -id),
+    поэтому любая порция стоит столько же, сколько первая.
+    """
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        "author"
+    )
+    return CursorPaginator(comments, per_page).get_page(cursor)
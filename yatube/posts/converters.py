@@ -0,0 +1,9 @@
+class FeedFormatConverter:
+    """Формат ленты в адресе: feed.rss, feed.atom, feed.json."""
+    regex = "rss|atom|json"
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return value
@@ -0,0 +1,110 @@
+from core.paginators import cached_count, sqlite_row_estimate
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .invalidation import (group_namespace, index_namespace,
+                           profile_namespace)
+from .models import Comment, Follow, Post, User, UserCounters
+
+
+def _bump(queryset, field, delta, **extra):
+    # Счётчик не уходит в минус, даже если он разошёлся с данными
+    # (например, после bulk_create): расхождение правит recount_counters.
+    if delta < 0:
+        queryset = queryset.filter(**{f"{field}__gte": -delta})
+    queryset.update(**{field: F(field) + delta}, **extra)
+
+
+def bump_user(user_id, field, delta):
+    _bump(UserCounters.objects.filter(user_id=user_id), field, delta)
+
+
+def bump_comments(post_id, delta):
+    # Комментарии — часть поста, поэтому вместе со счётчиком сдвигается
+    # его updated_at (поле отдаёт API).
+    _bump(
+        Post.objects.filter(pk=post_id), "comments_count", delta,
+        updated_at=timezone.now(),
+    )
+
+
+def exact_counts(user_id):
+    return {
+        "posts": Post.objects.filter(author_id=user_id).count(),
+        "followers": Follow.objects.filter(author_id=user_id).count(),
+        "following": Follow.objects.filter(user_id=user_id).count(),
+    }
+
+
+def counters_for(user):
+    """Счётчики пользователя; недостающая строка создаётся по факту."""
+    try:
+        return user.counters
+    except UserCounters.DoesNotExist:
+        counters, _ = UserCounters.objects.get_or_create(
+            user=user, defaults=exact_counts(user.pk)
+        )
+        return counters
+
+
+def index_count():
+    """Число всех постов для пагинатора главной (см. cached_count)."""
+    return cached_count(
+        "posts", [index_namespace], Post.objects.all(),
+        estimate=lambda: sqlite_row_estimate(Post),
+    )
+
+
+def group_count(group):
+    """Число постов группы для пагинатора её страницы."""
+    return cached_count(
+        f"group:{group.pk}", [group_namespace(group.slug)],
+        group.group.all(),
+    )
+
+
+def profile_count(author):
+    """Число постов автора для пагинатора профиля.
+
+    UserCounters.posts расходится с данными после bulk_create, а
+    пагинатору нужно число, по которому режутся страницы.
+    """
+    return cached_count(
+        f"profile:{author.pk}", [profile_namespace(author.username)],
+        author.posts.all(),
+    )
+
+
+def _count_of(queryset, field):
+    counted = queryset.filter(**{field: OuterRef("pk")}).order_by().values(
+        field
+    )
+    return Coalesce(
+        Subquery(counted.annotate(cnt=Count("pk")).values("cnt")), 0
+    )
+
+
+def recount_users():
+    """Пересчитывает счётчики всех пользователей одним UPDATE."""
+    missing = User.objects.filter(counters__isnull=True).values_list(
+        "pk", flat=True
+    )
+    UserCounters.objects.bulk_create(
+        [UserCounters(user_id=pk) for pk in missing.iterator()],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    counted = {
+        "posts": _count_of(Post.objects.all(), "author"),
+        "followers": _count_of(Follow.objects.all(), "author"),
+        "following": _count_of(Follow.objects.all(), "user"),
+    }
+    return UserCounters.objects.update(**counted)
+
+
+def recount_posts():
+    """Пересчитывает comments_count всех постов одним UPDATE."""
+    return Post.objects.update(
+        comments_count=_count_of(Comment.objects.all(), "post")
+    )
@@ -0,0 +1,364 @@
+import base64
+import sys
+from contextlib import contextmanager
+
+from core.versions import bump_version
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from . import search, timeline
+from .counters import recount_posts, recount_users
+from .invalidation import authors_namespace, groups_namespace, index_namespace
+from .models import Comment, Follow, Group, Post, User
+
+default_chunk_size: int = 2000
+default_batch_size: int = 500
+default_transaction_size: int = 5000
+record_types: tuple = ("user", "group", "post", "comment", "follow")
+
+
+class RecordError(ValueError):
+    """Запись выгрузки ссылается на пользователя, которого нет в базе.
+
+    line — номер строки, переданный в Importer.add, если он известен.
+    """
+
+    def __init__(self, record, message):
+        super().__init__(message)
+        self.record = record
+        self.line = None
+
+
+def _querysets(slugs):
+    """Что выгружать: всё или сообщества slugs со всеми участниками."""
+    if not slugs:
+        return (
+            User.objects.all(), Group.objects.all(), Post.objects.all(),
+            Comment.objects.all(), Follow.objects.all(),
+        )
+    groups = Group.objects.filter(slug__in=slugs)
+    posts = Post.objects.filter(group__in=groups)
+    comments = Comment.objects.filter(post__in=posts)
+    users = User.objects.filter(
+        Q(pk__in=posts.values("author_id"))
+        | Q(pk__in=comments.values("author_id"))
+    )
+    follows = Follow.objects.filter(user__in=users, author__in=users)
+    return users, groups, posts, comments, follows
+
+
+def _image_data(name):
+    with default_storage.open(name, "rb") as image:
+        return base64.b64encode(image.read()).decode()
+
+
+def export_records(slugs=None, with_images=False, with_credentials=False,
+                   chunk_size=default_chunk_size):
+    """Записи для NDJSON: пользователи, группы, посты, комментарии,
+    подписки — именно в этом порядке, чтобы импорт шёл одним проходом.
+
+    Связи записаны естественными ключами: username, slug, а пост
+    комментария — автором и pub_date. Даты — в ISO 8601 с микросекундами.
+    Хэши паролей и email выгружаются только с with_credentials. Querysets
+    читаются через iterator(), поэтому память не зависит от размера
+    выгрузки.
+    """
+    users, groups, posts, comments, follows = _querysets(slugs)
+    user_fields = ["username", "first_name", "last_name", "date_joined"]
+    if with_credentials:
+        user_fields += ["password", "email"]
+    for row in users.order_by("pk").values(
+        *user_fields
+    ).iterator(chunk_size=chunk_size):
+        row["date_joined"] = row["date_joined"].isoformat()
+        yield {"type": "user", **row}
+    for row in groups.order_by("pk").values(
+        "title", "slug", "description"
+    ).iterator(chunk_size=chunk_size):
+        yield {"type": "group", **row}
+    for row in posts.order_by("pk").values(
+        "pk", "text", "pub_date", "image", "author__username", "group__slug"
+    ).iterator(chunk_size=chunk_size):
+        record = {
+            "type": "post",
+            "id": row["pk"],
+            "author": row["author__username"],
+            "group": row["group__slug"],
+            "text": row["text"],
+            "pub_date": row["pub_date"].isoformat(),
+            "image": row["image"],
+        }
+        if with_images and row["image"]:
+            record["image_data"] = _image_data(row["image"])
+        yield record
+    for row in comments.order_by("pk").values(
+        "post__author__username", "post__pub_date", "author__username",
+        "text", "pub_date",
+    ).iterator(chunk_size=chunk_size):
+        yield {
+            "type": "comment",
+            "post_author": row["post__author__username"],
+            "post_pub_date": row["post__pub_date"].isoformat(),
+            "author": row["author__username"],
+            "text": row["text"],
+            "pub_date": row["pub_date"].isoformat(),
+        }
+    for row in follows.order_by("pk").values(
+        "user__username", "author__username"
+    ).iterator(chunk_size=chunk_size):
+        yield {
+            "type": "follow",
+            "user": row["user__username"],
+            "author": row["author__username"],
+        }
+
+
+@contextmanager
+def keep_pub_date():
+    """Отключает auto_now_add, чтобы сохранить даты из выгрузки."""
+    fields = [model._meta.get_field("pub_date") for model in (Post, Comment)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Importer:
+    """Загружает записи export_records пачками через bulk_create.
+
+    Ссылки разрешаются по естественным ключам одним запросом на пачку, и
+    между пачками ничего не копится: память не зависит от размера
+    выгрузки. Существующие пользователи и группы сопоставляются по
+    username и slug, пост комментария — по автору и pub_date (при
+    повторах — последний вставленный). bulk_create не посылает сигналы,
+    поэтому finish() пересчитывает счётчики, ленты, поисковый индекс и
+    версии кэша для строк, вставленных после начала импорта.
+    """
+
+    def __init__(self, batch_size=default_batch_size,
+                 transaction_size=default_transaction_size):
+        self.batch_size = batch_size
+        self.transaction_size = transaction_size
+        self.pending = []
+        self.pending_type = None
+        self.in_transaction = 0
+        self.counts = {}
+        self.atomic = None
+        self.last_pks = {}
+
+    def __enter__(self):
+        # Новые строки получают id больше этих: по ним finish() находит,
+        # что вставил импорт.
+        self.last_pks = {
+            model: model.objects.order_by("-pk").values_list(
+                "pk", flat=True
+            ).first() or 0
+            for model in (Group, Post, Follow)
+        }
+        self._keep_pub_date = keep_pub_date()
+        self._keep_pub_date.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                try:
+                    self.flush()
+                except BaseException:
+                    self._close_transaction(*sys.exc_info())
+                    raise
+            self._close_transaction(exc_type, exc, tb)
+        finally:
+            self._keep_pub_date.__exit__(exc_type, exc, tb)
+
+    def _close_transaction(self, *exc_info):
+        if self.atomic is not None:
+            atomic, self.atomic = self.atomic, None
+            atomic.__exit__(*exc_info)
+
+    def add(self, record, line=None):
+        kind = record["type"]
+        if kind not in record_types:
+            raise ValueError(f"Неизвестный тип записи: {kind}")
+        if kind != self.pending_type or len(self.pending) >= self.batch_size:
+            self.flush()
+            self.pending_type = kind
+        self.pending.append((line, record))
+
+    def flush(self):
+        if not self.pending:
+            return
+        if self.atomic is None:
+            self.atomic = transaction.atomic()
+            self.atomic.__enter__()
+        pending, self.pending = self.pending, []
+        records = [record for _, record in pending]
+        try:
+            getattr(self, f"_import_{self.pending_type}s")(records)
+        except RecordError as error:
+            error.line = next(
+                line for line, record in pending if record is error.record
+            )
+            raise
+        self.counts[self.pending_type] = (
+            self.counts.get(self.pending_type, 0) + len(records)
+        )
+        self.in_transaction += len(records)
+        if self.in_transaction >= self.transaction_size:
+            self._close_transaction(None, None, None)
+            self.in_transaction = 0
+
+    def _new(self, model):
+        return model.objects.filter(pk__gt=self.last_pks[model])
+
+    def _import_users(self, records):
+        names = [record["username"] for record in records]
+        existing = set(User.objects.filter(username__in=names).values_list(
+            "username", flat=True
+        ))
+        users = []
+        for record in records:
+            if record["username"] in existing:
+                continue
+            user = User(**{key: value for key, value in record.items()
+                           if key != "type"})
+            if "password" not in record:
+                user.set_unusable_password()
+            users.append(user)
+        User.objects.bulk_create(users, batch_size=self.batch_size)
+
+    def _import_groups(self, records):
+        slugs = [record["slug"] for record in records]
+        existing = set(Group.objects.filter(slug__in=slugs).values_list(
+            "slug", flat=True
+        ))
+        Group.objects.bulk_create(
+            [
+                Group(
+                    title=record["title"],
+                    slug=record["slug"],
+                    description=record["description"],
+                )
+                for record in records if record["slug"] not in existing
+            ],
+            batch_size=self.batch_size,
+        )
+
+    def _user_ids(self, *names):
+        """{username: id} для имён одной пачки."""
+        return dict(User.objects.filter(username__in=set(names)).values_list(
+            "username", "pk"
+        ))
+
+    @staticmethod
+    def _user_id(users, record, field="author"):
+        try:
+            return users[record[field]]
+        except KeyError:
+            raise RecordError(
+                record, f"Нет пользователя {record[field]!r} ({field})"
+            ) from None
+
+    def _image(self, record):
+        if record.get("image_data"):
+            return default_storage.save(
+                record["image"],
+                ContentFile(base64.b64decode(record["image_data"])),
+            )
+        return record["image"] or ""
+
+    def _import_posts(self, records):
+        users = self._user_ids(*(record["author"] for record in records))
+        groups = dict(Group.objects.filter(
+            slug__in={record["group"] for record in records}
+        ).values_list("slug", "pk"))
+        Post.objects.bulk_create(
+            [
+                Post(
+                    text=record["text"],
+                    pub_date=record["pub_date"],
+                    author_id=self._user_id(users, record),
+                    group_id=groups.get(record["group"]),
+                    image=self._image(record),
+                )
+                for record in records
+            ],
+            batch_size=self.batch_size,
+        )
+
+    def _post_ids(self, records):
+        """{(автор, pub_date): id поста} для комментариев одной пачки."""
+        keys = {
+            (record["post_author"], parse_datetime(record["post_pub_date"]))
+            for record in records
+        }
+        rows = Post.objects.filter(
+            author__username__in={author for author, _ in keys},
+            pub_date__in={pub_date for _, pub_date in keys},
+        ).order_by("pk").values_list("author__username", "pub_date", "pk")
+        return {(author, pub_date): pk for author, pub_date, pk in rows}
+
+    def _import_comments(self, records):
+        posts = self._post_ids(records)
+        users = self._user_ids(*(record["author"] for record in records))
+        comments = []
+        for record in records:
+            post_id = posts.get((
+                record["post_author"], parse_datetime(record["post_pub_date"])
+            ))
+            if post_id is not None:
+                comments.append(Comment(
+                    post_id=post_id,
+                    author_id=self._user_id(users, record),
+                    text=record["text"],
+                    pub_date=record["pub_date"],
+                ))
+        Comment.objects.bulk_create(comments, batch_size=self.batch_size)
+
+    def _import_follows(self, records):
+        users = self._user_ids(*(
+            name for record in records
+            for name in (record["user"], record["author"])
+        ))
+        follows = {
+            (
+                self._user_id(users, record, "user"),
+                self._user_id(users, record),
+            )
+            for record in records
+        }
+        Follow.objects.bulk_create(
+            [
+                Follow(user_id=user_id, author_id=author_id)
+                for user_id, author_id in follows if user_id != author_id
+            ],
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+
+    def finish(self):
+        """Восстанавливает то, что обычно поддерживают сигналы."""
+        recount_users()
+        recount_posts()
+        # Ленты: новые подписки и подписчики авторов новых постов.
+        pairs = Follow.objects.filter(
+            Q(pk__gt=self.last_pks[Follow])
+            | Q(author_id__in=self._new(Post).values("author_id"))
+        ).values_list("user_id", "author_id")
+        for user_id, author_id in pairs.iterator(chunk_size=self.batch_size):
+            timeline.backfill(user_id, author_id)
+        for group in self._new(Group).iterator(chunk_size=self.batch_size):
+            search.index(group)
+        for post in self._new(Post).only("pk", "text").iterator(
+            chunk_size=self.batch_size
+        ):
+            search.index(post)
+        # Импорт затрагивает любые списки: сбрасываются общие версии, от
+        # которых зависят главная, группы, профили и страницы постов.
+        bump_version(index_namespace, authors_namespace, groups_namespace)
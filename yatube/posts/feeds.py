@@ -0,0 +1,118 @@
+from itertools import chain
+
+from core.caching import versioned_stream
+from core.feeds import feed_classes, feed_item
+from django.conf import settings
+from django.core import signing
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+
+from .invalidation import (group_namespaces, index_namespace,
+                           index_namespaces, profile_namespace,
+                           profile_namespaces)
+from .models import Group, Post, User
+from .timeline import timeline
+
+cnt_feed_items: int = 50
+size_title: int = 30
+token_salt: str = "posts.follow_feed"
+
+
+def follow_feed_token(user):
+    """Подписанный токен ленты подписок: читалки лент не шлют cookie."""
+    return signing.dumps(user.pk, salt=token_salt)
+
+
+def _items(request, posts):
+    posts = posts.select_related("author", "group").order_by(
+        "-pub_date", "-pk"
+    )[:cnt_feed_items]
+    for post in posts.iterator():
+        link = request.build_absolute_uri(
+            reverse("posts:post_detail", args=[post.pk])
+        )
+        yield feed_item(
+            title=post.text[:size_title],
+            link=link,
+            description=post.text,
+            author_name=post.author.get_full_name() or post.author.username,
+            pubdate=post.pub_date,
+            updateddate=post.updated_at,
+            unique_id=link,
+            unique_id_is_permalink=True,
+            categories=[post.group.title] if post.group_id else (),
+        )
+
+
+def _feed(request, feed_format, key_prefix, namespaces, posts, title,
+          link, description):
+    feed_class = feed_classes[feed_format]
+
+    def chunks():
+        items = _items(request, posts)
+        first = next(items, None)
+        feed = feed_class(
+            title=title,
+            link=request.build_absolute_uri(link),
+            description=description,
+            feed_url=request.build_absolute_uri(),
+            language=settings.LANGUAGE_CODE,
+        )
+        if first is None:
+            return feed.stream(())
+        feed.latest = max(first["pubdate"], first["updateddate"])
+        return feed.stream(chain([first], items))
+
+    return versioned_stream(
+        request, f"{key_prefix}_feed_{feed_format}", namespaces,
+        feed_class.content_type, chunks, settings.PAGE_CACHE_TIMEOUT,
+    )
+
+
+def index_feed(request, feed_format):
+    return _feed(
+        request, feed_format, "index", index_namespaces(request),
+        Post.objects.all(),
+        "Yatube", reverse("posts:index"), "Последние обновления на сайте",
+    )
+
+
+def group_feed(request, slug, feed_format):
+    group = get_object_or_404(Group, slug=slug)
+    return _feed(
+        request, feed_format, "group", group_namespaces(request, slug),
+        group.group.all(),
+        f"Yatube: {group.title}",
+        reverse("posts:group_list", args=[slug]),
+        group.description,
+    )
+
+
+def profile_feed(request, username, feed_format):
+    author = get_object_or_404(User, username=username)
+    return _feed(
+        request, feed_format, "profile",
+        profile_namespaces(request, username),
+        author.posts.all(),
+        f"Yatube: {author.get_full_name() or author.username}",
+        reverse("posts:profile", args=[username]),
+        f"Записи пользователя {author.username}",
+    )
+
+
+def follow_feed(request, token, feed_format):
+    try:
+        user_id = signing.loads(token, salt=token_salt)
+    except signing.BadSignature:
+        raise Http404
+    user = get_object_or_404(User, pk=user_id)
+    # Ленту меняют посты авторов (версия index) и подписки читателя
+    # (версия его профиля).
+    namespaces = [index_namespace, profile_namespace(user.username)]
+    return _feed(
+        request, feed_format, f"follow_{user.pk}", namespaces,
+        timeline(user),
+        "Yatube: подписки", reverse("posts:follow_index"),
+        f"Посты авторов, на которых подписан {user.username}",
+    )
@@ -0,0 +1,123 @@
+from core.versions import bump_version
+
+from .models import Post, User
+
+index_namespace: str = "posts"
+authors_namespace: str = "users"
+groups_namespace: str = "groups"
+
+
+def group_namespace(slug):
+    return f"group_page:{slug}"
+
+
+def profile_namespace(username):
+    return f"profile_page:{username}"
+
+
+def index_namespaces(request):
+    return [index_namespace]
+
+
+def group_namespaces(request, slug):
+    return [group_namespace(slug), authors_namespace]
+
+
+def profile_namespaces(request, username):
+    # Карточки профиля показывают названия групп, а превью комментариев —
+    # имена комментаторов: переименования сбрасывают все профили.
+    return [profile_namespace(username), groups_namespace, authors_namespace]
+
+
+def post_validators(request, post_id):
+    """Версии страницы поста одним запросом по pk.
+
+    Страница зависит от поста, его комментариев (сбрасывают версию
+    профиля автора), автора и его числа постов (версия профиля), группы
+    и имён комментаторов. Время изменения (Last-Modified) не отдаётся:
+    ни одна дата не меняется вместе со всеми этими данными, и ответ по
+    If-Modified-Since был бы устаревшим. Остаётся только ETag.
+    """
+    row = Post.objects.filter(pk=post_id).order_by().values_list(
+        "author__username", "group__slug"
+    ).first()
+    if row is None:
+        return [f"post:{post_id}"], None
+    username, slug = row
+    namespaces = [
+        f"post:{post_id}", profile_namespace(username), authors_namespace
+    ]
+    if slug:
+        namespaces.append(group_namespace(slug))
+    return namespaces, None
+
+
+def post_namespaces(request, post_id):
+    return post_validators(request, post_id)[0]
+
+
+def _usernames(*user_ids):
+    return User.objects.filter(pk__in=user_ids).values_list(
+        "username", flat=True
+    )
+
+
+def remember_post_group(post):
+    """Запоминает группу поста до сохранения: при переносе поста нужно
+    сбросить страницы и старой, и новой группы."""
+    post._old_group_slug = None
+    if post.pk:
+        post._old_group_slug = Post.objects.filter(pk=post.pk).values_list(
+            "group__slug", flat=True
+        ).first()
+
+
+def post_changed(post):
+    namespaces = {index_namespace}
+    slugs = {getattr(post, "_old_group_slug", None)}
+    if post.group_id:
+        slugs.add(post.group.slug)
+    namespaces.update(group_namespace(slug) for slug in slugs if slug)
+    namespaces.update(
+        profile_namespace(name) for name in _usernames(post.author_id)
+    )
+    bump_version(*namespaces)
+
+
+def comment_changed(comment):
+    namespaces = {index_namespace}
+    row = Post.objects.filter(pk=comment.post_id).values_list(
+        "group__slug", "author__username"
+    ).first()
+    if row is not None:
+        slug, username = row
+        if slug:
+            namespaces.add(group_namespace(slug))
+        namespaces.add(profile_namespace(username))
+    bump_version(*namespaces)
+
+
+def group_changed(group, old_slug=None):
+    bump_version(
+        index_namespace,
+        groups_namespace,
+        *{group_namespace(slug) for slug in (group.slug, old_slug) if slug}
+    )
+
+
+def user_changed(user, old_username=None):
+    bump_version(
+        index_namespace,
+        authors_namespace,
+        *{
+            profile_namespace(name)
+            for name in (user.username, old_username) if name
+        }
+    )
+
+
+def follow_changed(follow):
+    bump_version(*(
+        profile_namespace(name)
+        for name in _usernames(follow.user_id, follow.author_id)
+    ))
@@ -0,0 +1,165 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (override_settings, setup_test_environment,
+                               teardown_test_environment)
+
+from posts import benchmark
+
+# seed и холодные замеры чистят кэш, поэтому прогон идёт на своём
+# LocMemCache и без реплик, не задевая кэш и базы сервера.
+benchmark_caches = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "benchmark",
+    },
+}
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет тестовую базу синтетическими данными и замеряет "
+        "время ответа, число SQL-запросов и память основных страниц."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--groups", type=int, default=5)
+        parser.add_argument("--posts", type=int, default=1000)
+        parser.add_argument("--comments", type=int, default=3000)
+        parser.add_argument(
+            "--follows", type=int, default=10,
+            help="Подписок на каждого пользователя.",
+        )
+        parser.add_argument(
+            "--images", type=float, default=0.1,
+            help="Доля постов с изображением.",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=50,
+            help="Запросов на каждую страницу.",
+        )
+        parser.add_argument(
+            "--cold", action="store_true",
+            help="Очищать кэш перед каждым запросом.",
+        )
+        parser.add_argument(
+            "--view", action="append", choices=benchmark.benchmark_views,
+            help="Замерить только эту страницу (можно повторять).",
+        )
+        parser.add_argument(
+            "--mixed", action="store_true",
+            help="Смешанная нагрузка: чтение index и запись add_comment.",
+        )
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--writers", type=int, default=2)
+        parser.add_argument(
+            "--duration", type=float, default=5.0,
+            help="Длительность смешанной нагрузки в секундах.",
+        )
+        parser.add_argument(
+            "--sqlite-profile", choices=("default", "production"),
+            default="default",
+            help="Прагмы и постоянные соединения SQLite для прогона.",
+        )
+        parser.add_argument(
+            "--output", default="-",
+            help="Файл для JSON-отчёта, по умолчанию stdout.",
+        )
+
+    def profile_settings(self, profile):
+        if profile == "production":
+            return (
+                settings.SQLITE_PRODUCTION_PRAGMAS,
+                settings.SQLITE_PRODUCTION_CONN_MAX_AGE,
+            )
+        return {}, 0
+
+    def measure(self, options):
+        benchmark.seed(
+            users=options["users"],
+            groups=options["groups"],
+            posts=options["posts"],
+            comments=options["comments"],
+            follows=options["follows"],
+            images=options["images"],
+        )
+        if options["mixed"]:
+            return benchmark.run_mixed(
+                readers=options["readers"],
+                writers=options["writers"],
+                duration=options["duration"],
+            )
+        return benchmark.run(
+            views=options["view"] or benchmark.benchmark_views,
+            requests=options["requests"],
+            cold=options["cold"],
+        )
+
+    def handle(self, *args, **options):
+        pragmas, conn_max_age = self.profile_settings(
+            options["sqlite_profile"]
+        )
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        old_conn_max_age = connection.settings_dict["CONN_MAX_AGE"]
+        # Файловая база: в памяти не бывает WAL, а потоки смешанной
+        # нагрузки должны работать с ней так же, как воркеры сервера.
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            MEDIA_ROOT=directory, SQLITE_PRAGMAS=pragmas,
+            CACHES=benchmark_caches, DATABASE_REPLICAS=[],
+        ):
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(
+                directory, "benchmark.sqlite3"
+            )
+            connection.settings_dict["CONN_MAX_AGE"] = conn_max_age
+            connection.creation.create_test_db(
+                verbosity=0, autoclobber=True
+            )
+            try:
+                results = self.measure(options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                connection.settings_dict["CONN_MAX_AGE"] = old_conn_max_age
+                teardown_test_environment()
+        report = {
+            "commit": current_commit(),
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "dataset": {
+                key: options[key] for key in (
+                    "users", "groups", "posts", "comments", "follows",
+                    "images",
+                )
+            },
+            "cold": options["cold"],
+            "mixed": options["mixed"],
+            "sqlite_profile": options["sqlite_profile"],
+            "results": results,
+        }
+        payload = json.dumps(report, ensure_ascii=False, indent=2)
+        if options["output"] == "-":
+            self.stdout.write(payload)
+            return
+        with open(options["output"], "w", encoding="utf-8") as output:
+            output.write(payload + "\n")
+        self.stdout.write(self.style.SUCCESS(
+            f"Отчёт сохранён в {options['output']}."
+        ))
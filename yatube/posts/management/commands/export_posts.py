@@ -0,0 +1,59 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.exchange import default_chunk_size, export_records
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает пользователей, группы, посты, комментарии и подписки "
+        "в NDJSON (по записи на строку)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--group", action="append", dest="groups", metavar="SLUG",
+            help="Выгрузить только это сообщество (можно повторять).",
+        )
+        parser.add_argument(
+            "--output", default="-",
+            help="Файл выгрузки, по умолчанию stdout.",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=default_chunk_size,
+            help="Сколько строк читать из базы за раз.",
+        )
+        parser.add_argument(
+            "--with-images", action="store_true",
+            help="Встроить файлы изображений в выгрузку (base64).",
+        )
+        parser.add_argument(
+            "--with-credentials", action="store_true",
+            help="Выгрузить хэши паролей и email пользователей.",
+        )
+
+    def handle(self, *args, **options):
+        output = self.stdout if options["output"] == "-" else open(
+            options["output"], "w", encoding="utf-8"
+        )
+        started = time.monotonic()
+        rows = 0
+        try:
+            for record in export_records(
+                slugs=options["groups"],
+                with_images=options["with_images"],
+                with_credentials=options["with_credentials"],
+                chunk_size=options["chunk_size"],
+            ):
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                rows += 1
+        finally:
+            if output is not self.stdout:
+                output.close()
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stderr.write(self.style.SUCCESS(
+            f"Выгружено записей: {rows} за {elapsed:.1f} с "
+            f"({rows / elapsed:.0f} строк/с)."
+        ))
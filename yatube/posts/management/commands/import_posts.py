@@ -0,0 +1,66 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.exchange import (Importer, RecordError, default_batch_size,
+                            default_transaction_size)
+
+
+class Command(BaseCommand):
+    help = "Загружает NDJSON-выгрузку export_posts пачками bulk_create."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--input", default="-",
+            help="Файл выгрузки, по умолчанию stdin.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=default_batch_size,
+            help="Сколько строк вставлять одним bulk_create.",
+        )
+        parser.add_argument(
+            "--transaction-size", type=int,
+            default=default_transaction_size,
+            help="Сколько строк фиксировать одной транзакцией.",
+        )
+
+    def handle(self, *args, **options):
+        source = sys.stdin if options["input"] == "-" else open(
+            options["input"], encoding="utf-8"
+        )
+        started = time.monotonic()
+        try:
+            with Importer(
+                batch_size=options["batch_size"],
+                transaction_size=options["transaction_size"],
+            ) as importer:
+                for number, line in enumerate(source, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        importer.add(json.loads(line), line=number)
+                    except RecordError:
+                        raise
+                    except (ValueError, KeyError) as error:
+                        raise CommandError(f"Строка {number}: {error}")
+        except RecordError as error:
+            # Ссылки проверяются при вставке пачки, уже после чтения
+            # строки, поэтому номер берётся из самой ошибки.
+            raise CommandError(f"Строка {error.line}: {error}")
+        except (ValueError, KeyError) as error:
+            raise CommandError(f"Ошибка при вставке пачки: {error!r}")
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        importer.finish()
+        elapsed = max(time.monotonic() - started, 1e-6)
+        rows = sum(importer.counts.values())
+        details = ", ".join(
+            f"{kind}: {count}" for kind, count in importer.counts.items()
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Загружено записей: {rows} ({details}) за {elapsed:.1f} с "
+            f"({rows / elapsed:.0f} строк/с)."
+        ))
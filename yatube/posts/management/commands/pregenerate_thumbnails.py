@@ -0,0 +1,49 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.models import Post
+from posts.thumbnails import pregenerate
+
+
+def pregenerate_safely(name):
+    try:
+        pregenerate(name)
+    except Exception as error:
+        return name, error
+    finally:
+        connections.close_all()
+    return name, None
+
+
+class Command(BaseCommand):
+    help = "Параллельно создаёт миниатюры для уже загруженных изображений."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=4,
+            help="Количество параллельных потоков.",
+        )
+
+    def handle(self, *args, **options):
+        names = Post.objects.exclude(image="").values_list(
+            "image", flat=True
+        ).order_by("pk")
+        started = time.monotonic()
+        done = failed = 0
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            for name, error in pool.map(
+                pregenerate_safely, names.iterator()
+            ):
+                if error is None:
+                    done += 1
+                else:
+                    failed += 1
+                    self.stderr.write(f"{name}: {error}")
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Обработано изображений: {done}, ошибок: {failed} "
+            f"за {elapsed:.1f} с."
+        ))
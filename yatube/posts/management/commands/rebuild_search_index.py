@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = "Перестраивает поисковый индекс постов и групп."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=500,
+            help="Сколько строк читать из базы за раз.",
+        )
+
+    def handle(self, *args, **options):
+        indexed = search.rebuild(batch_size=options["batch_size"])
+        backend = "FTS5" if search.use_fts5() else "SearchTerm"
+        self.stdout.write(self.style.SUCCESS(
+            f"Проиндексировано объектов: {indexed} ({backend})."
+        ))
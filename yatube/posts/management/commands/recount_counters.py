@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount_posts, recount_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает денормализованные счётчики постов, подписок "
+        "и комментариев по фактическим данным."
+    )
+
+    def handle(self, *args, **options):
+        users = recount_users()
+        posts = recount_posts()
+        self.stdout.write(self.style.SUCCESS(
+            f"Счётчики пересчитаны: пользователей {users}, постов {posts}."
+        ))
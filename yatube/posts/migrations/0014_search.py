@@ -0,0 +1,90 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:24
+
+from collections import Counter
+import re
+
+from django.db import migrations, models
+from django.db.utils import OperationalError
+
+FTS_TABLES = ('posts_post_fts', 'posts_group_fts')
+
+
+def documents(apps):
+    Post = apps.get_model('posts', 'Post')
+    Group = apps.get_model('posts', 'Group')
+    for pk, text in Post.objects.values_list('pk', 'text').iterator():
+        yield 'post', pk, text
+    for pk, title, description in Group.objects.values_list(
+        'pk', 'title', 'description'
+    ).iterator():
+        yield 'group', pk, f'{title} {description}'
+
+
+def create_fts_tables(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        try:
+            with connection.cursor() as cursor:
+                for table in FTS_TABLES:
+                    cursor.execute(
+                        f'CREATE VIRTUAL TABLE {table} USING fts5(body)'
+                    )
+                for kind, pk, text in documents(apps):
+                    cursor.execute(
+                        f'INSERT INTO posts_{kind}_fts (rowid, body) '
+                        f'VALUES (%s, %s)',
+                        [pk, text],
+                    )
+            return
+        except OperationalError:
+            # SQLite собран без FTS5: используется SearchTerm.
+            pass
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    for kind, pk, text in documents(apps):
+        terms = Counter(
+            term[:64] for term in re.findall(r'\w+', text.lower())
+        )
+        SearchTerm.objects.bulk_create([
+            SearchTerm(kind=kind, object_id=pk, term=term, weight=weight)
+            for term, weight in terms.items()
+        ])
+
+
+def drop_fts_tables(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            for table in FTS_TABLES:
+                cursor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=10, verbose_name='Тип объекта')),
+                ('object_id', models.PositiveIntegerField(verbose_name='Id объекта')),
+                ('term', models.CharField(max_length=64, verbose_name='Слово')),
+                ('weight', models.PositiveIntegerField(default=1, verbose_name='Число вхождений')),
+            ],
+            options={
+                'verbose_name': 'Слово поискового индекса',
+                'verbose_name_plural': 'Поисковый индекс',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['kind', 'term'], name='search_term_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['kind', 'object_id'], name='search_object_idx'),
+        ),
+        migrations.RunPython(create_fts_tables, drop_fts_tables),
+    ]
@@ -1,4 +1,4 @@
-from core.models import CreatedModel
+from core.models import CreatedModel, UpdatedModel
 from django.contrib.auth import get_user_model
 from django.db import models
 
@@ -6,7 +6,7 @@ User = get_user_model()
 title_size: int = 15
 
 
-class Post(CreatedModel):
+class Post(CreatedModel, UpdatedModel):
     text = models.TextField(
         "Текст записи",
         help_text="Напишите текст поста"
@@ -32,16 +32,31 @@ class Post(CreatedModel):
         blank=True,
         help_text="Можно добавить изображение",
     )
+    comments_count = models.PositiveIntegerField(
+        "Комментариев",
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         ordering = ["-pub_date", ]
         verbose_name_plural = "Посты"
+        indexes = [
+            models.Index(
+                fields=["author", "-pub_date", "-id"],
+                name="post_author_date_idx",
+            ),
+            models.Index(
+                fields=["group", "-pub_date", "-id"],
+                name="post_group_date_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.text[:title_size]
 
 
-class Group(models.Model):
+class Group(UpdatedModel):
     title = models.CharField(
         "Название группы",
         max_length=200,
@@ -67,7 +82,7 @@ class Group(models.Model):
         return self.title
 
 
-class Comment(CreatedModel):
+class Comment(CreatedModel, UpdatedModel):
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
@@ -88,6 +103,12 @@ class Comment(CreatedModel):
         ordering = ["-pub_date"]
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
+        indexes = [
+            models.Index(
+                fields=["post", "-pub_date", "-id"],
+                name="comment_post_date_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.text
@@ -115,3 +136,83 @@ class Follow(models.Model):
                 fields=["user", "author"], name="unique_follow"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["author", "user"], name="follow_author_user_idx"
+            ),
+        ]
+
+
+class UserCounters(models.Model):
+    """Денормализованные счётчики пользователя для страницы профиля."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="counters",
+        verbose_name="Пользователь"
+    )
+    posts = models.PositiveIntegerField("Постов", default=0)
+    followers = models.PositiveIntegerField("Подписчиков", default=0)
+    following = models.PositiveIntegerField("Подписок", default=0)
+
+    class Meta:
+        verbose_name = "Счётчики пользователя"
+        verbose_name_plural = "Счётчики пользователей"
+
+    def __str__(self):
+        return str(self.user_id)
+
+
+class TimelineEntry(models.Model):
+    """Материализованная лента подписок: пост, разосланный подписчику."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="timeline",
+        verbose_name="Подписчик"
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="timeline_entries",
+        verbose_name="Пост"
+    )
+    pub_date = models.DateTimeField("Дата публикации поста")
+
+    class Meta:
+        ordering = ["-pub_date"]
+        verbose_name = "Запись ленты"
+        verbose_name_plural = "Ленты подписок"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "post"], name="unique_timeline_entry"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-pub_date", "-post"],
+                name="timeline_user_date_idx",
+            )
+        ]
+
+
+class SearchTerm(models.Model):
+    """Инвертированный индекс поиска для баз без SQLite FTS5."""
+    kind = models.CharField("Тип объекта", max_length=10)
+    object_id = models.PositiveIntegerField("Id объекта")
+    term = models.CharField("Слово", max_length=64)
+    weight = models.PositiveIntegerField("Число вхождений", default=1)
+
+    class Meta:
+        verbose_name = "Слово поискового индекса"
+        verbose_name_plural = "Поисковый индекс"
+        indexes = [
+            models.Index(fields=["kind", "term"], name="search_term_idx"),
+            models.Index(
+                fields=["kind", "object_id"], name="search_object_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return self.term
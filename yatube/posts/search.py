@@ -0,0 +1,166 @@
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, Count, IntegerField, Sum, Value, When
+
+from .models import Group, Post, SearchTerm
+
+term_re = re.compile(r"\w+")
+term_max_length: int = 64
+fts_tables = {
+    "post": "posts_post_fts",
+    "group": "posts_group_fts",
+}
+
+
+def tokenize(text):
+    return [
+        term[:term_max_length] for term in term_re.findall(text.lower())
+    ]
+
+
+def document(obj):
+    if isinstance(obj, Group):
+        return "group", f"{obj.title} {obj.description}"
+    return "post", obj.text
+
+
+_fts5_ready = False
+
+
+def fts5_tables_exist():
+    # Запоминается только найденное: до migrate таблиц ещё нет, и
+    # отрицательный ответ не должен пережить миграцию.
+    global _fts5_ready
+    if not _fts5_ready:
+        tables = connection.introspection.table_names()
+        _fts5_ready = all(table in tables for table in fts_tables.values())
+    return _fts5_ready
+
+
+def use_fts5():
+    if settings.SEARCH_BACKEND == "inverted":
+        return False
+    return connection.vendor == "sqlite" and fts5_tables_exist()
+
+
+class FTS5Backend:
+    """Поиск через виртуальные таблицы SQLite FTS5 с ранжированием bm25."""
+
+    def index(self, kind, pk, text):
+        table = fts_tables[kind]
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE rowid = %s", [pk])
+            cursor.execute(
+                f"INSERT INTO {table} (rowid, body) VALUES (%s, %s)",
+                [pk, text],
+            )
+
+    def remove(self, kind, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {fts_tables[kind]} WHERE rowid = %s", [pk]
+            )
+
+    def clear(self, kind):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {fts_tables[kind]}")
+
+    def search(self, kind, terms, limit):
+        table = fts_tables[kind]
+        query = " ".join(f'"{term}"' for term in terms)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {table} WHERE {table} MATCH %s "
+                f"ORDER BY rank LIMIT %s",
+                [query, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class InvertedIndexBackend:
+    """Поиск по таблице SearchTerm: все слова запроса должны встретиться,
+    выше — объекты с большим числом вхождений."""
+
+    def index(self, kind, pk, text):
+        self.remove(kind, pk)
+        SearchTerm.objects.bulk_create([
+            SearchTerm(kind=kind, object_id=pk, term=term, weight=weight)
+            for term, weight in Counter(tokenize(text)).items()
+        ])
+
+    def remove(self, kind, pk):
+        SearchTerm.objects.filter(kind=kind, object_id=pk).delete()
+
+    def clear(self, kind):
+        SearchTerm.objects.filter(kind=kind).delete()
+
+    def search(self, kind, terms, limit):
+        matches = SearchTerm.objects.filter(
+            kind=kind, term__in=terms
+        ).values("object_id").annotate(
+            matched=Count("term"), score=Sum("weight")
+        ).filter(matched=len(terms)).order_by("-score", "-object_id")
+        return [row["object_id"] for row in matches[:limit]]
+
+
+def backend():
+    return FTS5Backend() if use_fts5() else InvertedIndexBackend()
+
+
+def index(obj):
+    kind, text = document(obj)
+    backend().index(kind, obj.pk, text)
+
+
+def remove(obj):
+    kind, _ = document(obj)
+    backend().remove(kind, obj.pk)
+
+
+def search(kind, query, limit=None):
+    """Id объектов, найденных по запросу, в порядке релевантности."""
+    terms = sorted(set(tokenize(query)))
+    if not terms:
+        return []
+    return backend().search(kind, terms, limit or settings.SEARCH_MAX_RESULTS)
+
+
+def ranked(queryset, ids):
+    """Queryset объектов ids в порядке ранжирования."""
+    if not ids:
+        return queryset.none()
+    order = Case(
+        *[When(pk=pk, then=Value(rank)) for rank, pk in enumerate(ids)],
+        output_field=IntegerField(),
+    )
+    return queryset.filter(pk__in=ids).order_by(order)
+
+
+def search_posts(query):
+    return ranked(
+        Post.objects.select_related("author", "group"), search("post", query)
+    )
+
+
+def search_groups(query, limit):
+    return ranked(Group.objects.all(), search("group", query, limit))
+
+
+def rebuild(batch_size=500):
+    """Перестраивает индекс по всем постам и группам."""
+    current = backend()
+    indexed = 0
+    for kind, model, fields in (
+        ("post", Post, ("pk", "text")),
+        ("group", Group, ("pk", "title", "description")),
+    ):
+        current.clear(kind)
+        for row in model.objects.order_by().values_list(*fields).iterator(
+            chunk_size=batch_size
+        ):
+            current.index(kind, row[0], " ".join(row[1:]))
+            indexed += 1
+    return indexed
@@ -0,0 +1,118 @@
+from core.versions import bump_version
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import counters, invalidation, search, timeline
+from .models import Comment, Follow, Group, Post, User, UserCounters
+
+
+display_fields: tuple = ("username", "first_name", "last_name")
+
+
+def _only_last_login(update_fields):
+    return update_fields == frozenset({"last_login"})
+
+
+@receiver(pre_save, sender=User)
+def user_before_save(sender, instance, update_fields, **kwargs):
+    instance._old_username = instance._old_display = None
+    if instance.pk and not _only_last_login(update_fields):
+        instance._old_display = User.objects.filter(
+            pk=instance.pk
+        ).values_list(*display_fields).first()
+        if instance._old_display:
+            instance._old_username = instance._old_display[0]
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    if created:
+        UserCounters.objects.get_or_create(user=instance)
+        return
+    # На страницах видны только имя и username: смена пароля, прав или
+    # email кэш не сбрасывает.
+    display = tuple(getattr(instance, name) for name in display_fields)
+    if instance._old_display and instance._old_display != display:
+        bump_version(f"user:{instance.pk}")
+        invalidation.user_changed(instance, instance._old_username)
+
+
+@receiver(pre_save, sender=Group)
+def group_before_save(sender, instance, **kwargs):
+    instance._old_slug = None
+    if instance.pk:
+        instance._old_slug = Group.objects.filter(
+            pk=instance.pk
+        ).values_list("slug", flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, **kwargs):
+    bump_version(f"group:{instance.pk}")
+    invalidation.group_changed(instance, instance._old_slug)
+    search.index(instance)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    bump_version(f"group:{instance.pk}")
+    invalidation.group_changed(instance)
+    search.remove(instance)
+
+
+@receiver(pre_save, sender=Post)
+def post_before_save(sender, instance, **kwargs):
+    invalidation.remember_post_group(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_user(instance.author_id, "posts", 1)
+        timeline.fan_out(instance)
+    bump_version(f"post:{instance.pk}")
+    invalidation.post_changed(instance)
+    search.index(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.bump_user(instance.author_id, "posts", -1)
+    bump_version(f"post:{instance.pk}")
+    invalidation.post_changed(instance)
+    search.remove(instance)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_comments(instance.post_id, 1)
+    else:
+        Post.objects.filter(pk=instance.post_id).update(
+            updated_at=timezone.now()
+        )
+    invalidation.comment_changed(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.bump_comments(instance.post_id, -1)
+    invalidation.comment_changed(instance)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_user(instance.author_id, "followers", 1)
+        counters.bump_user(instance.user_id, "following", 1)
+        timeline.backfill(instance.user_id, instance.author_id)
+        invalidation.follow_changed(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.bump_user(instance.author_id, "followers", -1)
+    counters.bump_user(instance.user_id, "following", -1)
+    timeline.prune(instance.user_id, instance.author_id)
+    invalidation.follow_changed(instance)
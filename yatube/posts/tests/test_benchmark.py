@@ -0,0 +1,38 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from posts import benchmark
+from posts.models import Comment, Post, TimelineEntry, UserCounters
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class BenchmarkTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_seed_keeps_denormalised_data(self):
+        """seed заполняет базу и пересчитывает счётчики и ленты."""
+        benchmark.seed(users=5, groups=2, posts=20, comments=30, follows=2)
+        self.assertEqual(Post.objects.count(), 20)
+        self.assertEqual(Comment.objects.count(), 30)
+        self.assertEqual(UserCounters.objects.count(), 5)
+        self.assertEqual(
+            sum(UserCounters.objects.values_list("posts", flat=True)), 20
+        )
+        self.assertTrue(TimelineEntry.objects.exists())
+
+    def test_run_reports_every_view(self):
+        """Отчёт содержит перцентили, запросы и память для каждого view."""
+        benchmark.seed(users=4, groups=1, posts=10, comments=10, follows=1)
+        report = benchmark.run(requests=3)
+        self.assertEqual(set(report), set(benchmark.benchmark_views))
+        for result in report.values():
+            self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+            self.assertGreater(result["queries_max"], 0)
+            self.assertGreater(result["peak_kib"], 0)
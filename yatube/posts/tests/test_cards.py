@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from posts.cards import render_post_cards
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class PostCardsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(
+            username="writer", first_name="Лев", last_name="Толстой"
+        )
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test_slug",
+            description="Текст описания тестовой группы"
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text="Исходный текст", author=self.author, group=self.group
+        )
+
+    def card(self):
+        posts = Post.objects.select_related("author", "group").filter(
+            pk=self.post.pk
+        )
+        return render_post_cards(posts)[0][1]
+
+    def test_card_is_cached(self):
+        """Повторный рендер берёт карточку из кэша."""
+        self.assertIn("Исходный текст", self.card())
+        Post.objects.filter(pk=self.post.pk).update(text="Без сигнала")
+        self.assertIn("Исходный текст", self.card())
+
+    def test_post_save_invalidates_card(self):
+        """Сохранение поста обновляет карточку."""
+        self.card()
+        self.post.text = "Новый текст"
+        self.post.save()
+        self.assertIn("Новый текст", self.card())
+
+    def test_author_and_group_save_invalidate_card(self):
+        """Сохранение автора или группы обновляет карточку."""
+        self.card()
+        self.author.first_name = "Алексей"
+        self.author.save()
+        self.assertIn("Алексей", self.card())
+        self.group.title = "Новое название"
+        self.group.save()
+        self.assertIn("Новое название", self.card())
+
+    def test_login_keeps_card(self):
+        """Вход автора на сайт не сбрасывает карточки."""
+        html = self.card()
+        self.client.force_login(self.author)
+        Post.objects.filter(pk=self.post.pk).update(text="Без сигнала")
+        self.assertEqual(html, self.card())
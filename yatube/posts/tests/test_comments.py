@@ -0,0 +1,120 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from posts.comments import (attach_comment_previews, cnt_comments,
+                            latest_comments)
+from posts.models import Comment, Post
+
+User = get_user_model()
+cnt_test_posts: int = 4
+cnt_test_comments: int = 5
+cnt_viral_comments: int = 25
+
+
+class CommentPreviewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="writer")
+        cls.posts = [
+            Post.objects.create(text=f"Пост {number}", author=cls.author)
+            for number in range(cnt_test_posts)
+        ]
+        cls.quiet = Post.objects.create(text="Без комментариев",
+                                        author=cls.author)
+        for post in cls.posts:
+            for number in range(cnt_test_comments):
+                Comment.objects.create(
+                    post=post, author=cls.author,
+                    text=f"{post.text}: комментарий {number}",
+                )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_latest_comments_one_query(self):
+        """Превью всех постов страницы — один запрос, новые сверху."""
+        pks = [post.pk for post in self.posts]
+        with self.assertNumQueries(1):
+            previews = latest_comments(pks, limit=2)
+        for post in self.posts:
+            self.assertEqual(
+                [comment.text for comment in previews[post.pk]],
+                [f"{post.text}: комментарий 4", f"{post.text}: комментарий 3"],
+            )
+            self.assertEqual(previews[post.pk][0].author_username, "writer")
+
+    def test_posts_without_comments_skip_query(self):
+        """Для страницы без комментариев запроса нет."""
+        posts = list(Post.objects.filter(pk=self.quiet.pk))
+        with self.assertNumQueries(0):
+            attach_comment_previews(posts)
+        self.assertEqual(posts[0].latest_comments, [])
+
+    def test_index_shows_previews(self):
+        """На главной видны счётчик и последние комментарии."""
+        response = self.client.get(reverse("posts:index"))
+        self.assertContains(response, "Комментариев: 5")
+        self.assertContains(response, "Пост 0: комментарий 4")
+        self.assertNotContains(response, "Пост 0: комментарий 1")
+
+
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="writer")
+        cls.post = Post.objects.create(text="Вирусный пост", author=cls.author)
+        for number in range(cnt_viral_comments):
+            Comment.objects.create(
+                post=cls.post, author=cls.author, text=f"Отзыв №{number}:"
+            )
+        cls.detail = reverse("posts:post_detail", args=[cls.post.pk])
+        cls.fragment = reverse("posts:post_comments", args=[cls.post.pk])
+
+    def setUp(self):
+        cache.clear()
+
+    def texts(self, page):
+        return [comment.text for comment in page]
+
+    def test_post_detail_renders_first_batch(self):
+        """Страница поста показывает только первую порцию комментариев."""
+        response = self.client.get(self.detail)
+        comments = response.context["comments"]
+        self.assertEqual(len(comments), cnt_comments)
+        self.assertEqual(comments[0].text, f"Отзыв №{cnt_viral_comments - 1}:")
+        self.assertTrue(comments.has_next())
+        self.assertContains(response, "Показать ещё")
+        self.assertNotContains(response, "Отзыв №0:")
+
+    def test_fragment_returns_next_batch(self):
+        """Фрагмент по курсору отдаёт остаток без повторов."""
+        first = self.client.get(self.detail).context["comments"]
+        response = self.client.get(
+            self.fragment, {"cursor": first.next_cursor}
+        )
+        rest = response.context["comments"]
+        self.assertEqual(
+            len(self.texts(first) + self.texts(rest)), cnt_viral_comments
+        )
+        self.assertFalse(set(self.texts(first)) & set(self.texts(rest)))
+        self.assertFalse(rest.has_next())
+        self.assertNotContains(response, "Показать ещё")
+        self.assertNotContains(response, "<html")
+
+    def test_fragment_without_js_fallback(self):
+        """Без JS ссылка открывает страницу поста со следующей порцией."""
+        first = self.client.get(self.detail).context["comments"]
+        response = self.client.get(
+            self.detail, {"comments": first.next_cursor}
+        )
+        self.assertContains(response, "Отзыв №0:")
+
+    def test_fragment_missing_post(self):
+        """Фрагмент несуществующего поста — 404."""
+        response = self.client.get(
+            reverse("posts:post_comments", args=[self.post.pk + 100])
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,71 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from posts.models import Comment, Follow, Post, UserCounters
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username="writer")
+        cls.reader = User.objects.create(username="reader")
+
+    def counters(self, user):
+        return UserCounters.objects.get(user=user)
+
+    def test_post_counter(self):
+        """Счётчик постов следует за созданием и удалением."""
+        post = Post.objects.create(text="Пост", author=self.author)
+        self.assertEqual(self.counters(self.author).posts, 1)
+        post.delete()
+        self.assertEqual(self.counters(self.author).posts, 0)
+
+    def test_follow_counters(self):
+        """Счётчики подписчиков и подписок."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.counters(self.author).followers, 1)
+        self.assertEqual(self.counters(self.reader).following, 1)
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertEqual(self.counters(self.author).followers, 0)
+        self.assertEqual(self.counters(self.reader).following, 0)
+
+    def test_comment_counter(self):
+        """Счётчик комментариев поста."""
+        post = Post.objects.create(text="Пост", author=self.author)
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text="Комментарий"
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+    def test_recount_fixes_drift(self):
+        """recount_counters исправляет счётчики после bulk_create."""
+        Post.objects.bulk_create(
+            [Post(text=f"Пост {i}", author=self.author) for i in range(3)]
+        )
+        post = Post.objects.first()
+        Comment.objects.bulk_create(
+            [Comment(post=post, author=self.reader, text="Комментарий")]
+        )
+        UserCounters.objects.filter(user=self.reader).delete()
+        call_command("recount_counters", stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(self.counters(self.author).posts, 3)
+        self.assertEqual(self.counters(self.reader).posts, 0)
+        self.assertEqual(post.comments_count, 1)
+
+    def test_profile_without_aggregates(self):
+        """Профиль берёт счётчики из UserCounters."""
+        Post.objects.create(text="Пост", author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.client.get(f"/profile/{self.author.username}/")
+        self.assertEqual(response.context["count_posts"], 1)
+        self.assertContains(response, "Подписчиков: 1")
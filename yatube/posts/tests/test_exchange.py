@@ -0,0 +1,177 @@
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from posts import search
+from posts.exchange import Importer, export_records
+from posts.models import (Comment, Follow, Group, Post, TimelineEntry,
+                          UserCounters)
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+test_img = (
+    b"\x47\x49\x46\x38\x39\x61\x02\x00"
+    b"\x01\x00\x80\x00\x00\x00\x00\x00"
+    b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
+    b"\x00\x00\x00\x2C\x00\x00\x00\x00"
+    b"\x02\x00\x01\x00\x00\x02\x02\x0C"
+    b"\x0A\x00\x3B"
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ExchangeTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username="writer")
+        self.reader = User.objects.create(username="reader")
+        self.group = Group.objects.create(
+            title="Совы", slug="owls", description="Про сов"
+        )
+        self.other = Group.objects.create(
+            title="Коты", slug="cats", description="Про котов"
+        )
+        self.post = Post.objects.create(
+            text="Филин ухает ночью",
+            author=self.author,
+            group=self.group,
+            image=SimpleUploadedFile("owl.gif", test_img, "image/gif"),
+        )
+        self.pub_date = timezone.now() - timedelta(days=30)
+        Post.objects.filter(pk=self.post.pk).update(pub_date=self.pub_date)
+        Post.objects.create(text="Кот", author=self.reader, group=self.other)
+        Comment.objects.create(
+            post=self.post, author=self.reader, text="Угу"
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def export(self, *args):
+        output = StringIO()
+        call_command("export_posts", *args, stdout=output, stderr=StringIO())
+        return output.getvalue()
+
+    def test_export_group(self):
+        """Выгрузка сообщества содержит только его посты и участников."""
+        records = [
+            json.loads(line)
+            for line in self.export("--group", "owls").splitlines()
+        ]
+        kinds = [record["type"] for record in records]
+        self.assertEqual(
+            kinds, ["user", "user", "group", "post", "comment", "follow"]
+        )
+        self.assertEqual(records[3]["text"], "Филин ухает ночью")
+
+    def test_credentials_are_opt_in(self):
+        """Хэши паролей и email выгружаются только по флагу."""
+        self.author.set_password("secret")
+        self.author.email = "writer@example.com"
+        self.author.save()
+        for args, exported in (((), False), (("--with-credentials",), True)):
+            with self.subTest(args=args):
+                user = json.loads(self.export(*args).splitlines()[0])
+                self.assertEqual("password" in user, exported)
+                self.assertEqual("email" in user, exported)
+
+    def test_round_trip(self):
+        """Импорт восстанавливает данные, счётчики, ленты и поиск."""
+        dump = self.export("--group", "owls", "--with-images")
+        image = self.post.image.name
+        Post.objects.all().delete()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.post.image.storage.delete(image)
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson") as source:
+            source.write(dump)
+            source.flush()
+            call_command(
+                "import_posts", "--input", source.name, "--batch-size", "1",
+                "--transaction-size", "2", stdout=StringIO(),
+            )
+        post = Post.objects.get()
+        author = User.objects.get(username="writer")
+        reader = User.objects.get(username="reader")
+        self.assertEqual(post.author, author)
+        self.assertEqual(post.group.slug, "owls")
+        self.assertEqual(post.pub_date, self.pub_date)
+        self.assertEqual(post.comments_count, 1)
+        self.assertTrue(post.image.storage.exists(post.image.name))
+        self.assertEqual(UserCounters.objects.get(user=author).followers, 1)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=reader, post=post).exists()
+        )
+        self.assertEqual(list(search.search_posts("филин")), [post])
+        self.assertFalse(author.has_usable_password())
+
+    def test_importer_state_does_not_grow(self):
+        """Импорт не копит id и имена по всем строкам выгрузки."""
+        Post.objects.bulk_create([
+            Post(text=f"Пост {number}", author=self.author, group=self.group)
+            for number in range(20)
+        ])
+        records = list(export_records(slugs=["owls"]))
+        with Importer(batch_size=3) as importer:
+            for record in records:
+                importer.add(record)
+                sizes = {
+                    name: len(value) for name, value in vars(importer).items()
+                    if isinstance(value, (dict, list, set))
+                }
+                self.assertLessEqual(max(sizes.values()), 5, sizes)
+        importer.finish()
+        self.assertEqual(Post.objects.filter(group=self.group).count(), 42)
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_import_reuses_existing_rows(self):
+        """Повторный импорт не дублирует пользователей и группы."""
+        dump = self.export("--group", "owls")
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson") as source:
+            source.write(dump)
+            source.flush()
+            call_command("import_posts", "--input", source.name,
+                         stdout=StringIO())
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertEqual(Post.objects.filter(group=self.group).count(), 2)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_unknown_author_reports_its_line(self):
+        """Ссылка на неизвестного автора сообщается с номером строки."""
+        user, _, group, post = self.export("--group", "owls").splitlines()[
+            :4
+        ]
+        ghost = json.dumps({**json.loads(post), "author": "ghost"})
+        for lines, number in (
+            ([user, group, ghost], 3),
+            ([user, group, post, ghost, post], 4),
+        ):
+            with self.subTest(number=number):
+                posts = Post.objects.count()
+                with tempfile.NamedTemporaryFile(
+                    "w", suffix=".ndjson"
+                ) as source:
+                    source.write("\n".join(lines) + "\n")
+                    source.flush()
+                    with self.assertRaisesMessage(
+                        CommandError, f"Строка {number}: Нет пользователя"
+                    ):
+                        call_command(
+                            "import_posts", "--input", source.name,
+                            "--batch-size", "2", stdout=StringIO(),
+                        )
+                self.assertEqual(Post.objects.count(), posts)
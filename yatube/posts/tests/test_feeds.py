@@ -0,0 +1,108 @@
+import json
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from posts.feeds import follow_feed_token
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+def content(response):
+    if response.streaming:
+        return b"".join(response.streaming_content)
+    return response.content
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username="writer")
+        cls.reader = User.objects.create(username="reader")
+        cls.group = Group.objects.create(
+            title="Совы", slug="owls", description="Про сов"
+        )
+        cls.owl = Post.objects.create(
+            text="Филин ухает", author=cls.author, group=cls.group
+        )
+        cls.cat = Post.objects.create(text="Кот мурчит", author=cls.reader)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_formats(self):
+        """Лента отдаётся в RSS, Atom и JSON Feed."""
+        url = reverse("posts:index_feed", args=["rss"])
+        rss = ElementTree.fromstring(content(self.client.get(url)))
+        self.assertEqual(
+            [item.findtext("title") for item in rss.iter("item")],
+            ["Кот мурчит", "Филин ухает"],
+        )
+        url = reverse("posts:index_feed", args=["atom"])
+        atom = ElementTree.fromstring(content(self.client.get(url)))
+        self.assertEqual(
+            len(atom.findall("{http://www.w3.org/2005/Atom}entry")), 2
+        )
+        url = reverse("posts:index_feed", args=["json"])
+        feed = json.loads(content(self.client.get(url)))
+        self.assertEqual(
+            [item["title"] for item in feed["items"]],
+            ["Кот мурчит", "Филин ухает"],
+        )
+
+    def test_group_and_profile_feeds(self):
+        """Ленты группы и автора содержат только их посты."""
+        for url in (
+            reverse("posts:group_feed", args=["owls", "json"]),
+            reverse("posts:profile_feed", args=["writer", "json"]),
+        ):
+            with self.subTest(url=url):
+                feed = json.loads(content(self.client.get(url)))
+                self.assertEqual(
+                    [item["title"] for item in feed["items"]],
+                    ["Филин ухает"],
+                )
+
+    def test_feed_cached_with_etag(self):
+        """Лента кэшируется, отдаёт 304 и обновляется с новым постом."""
+        url = reverse("posts:index_feed", args=["rss"])
+        first = self.client.get(url)
+        self.assertTrue(first.streaming)
+        body = content(first)
+        second = self.client.get(url)
+        self.assertFalse(second.streaming)
+        self.assertEqual(second.content, body)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(text="Сыч молчит", author=self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Сыч молчит".encode(), content(response))
+
+    def test_feed_cached_per_host(self):
+        """Лента с другого хоста не отдаётся из кэша первого."""
+        url = reverse("posts:index_feed", args=["rss"])
+        content(self.client.get(url, HTTP_HOST="localhost"))
+        body = content(self.client.get(url, HTTP_HOST="127.0.0.1"))
+        self.assertIn(b"http://127.0.0.1/", body)
+        self.assertNotIn(b"http://localhost/", body)
+
+    def test_follow_feed(self):
+        """Лента подписок открывается по токену и следит за подписками."""
+        url = reverse(
+            "posts:follow_feed",
+            args=[follow_feed_token(self.reader), "json"],
+        )
+        feed = json.loads(content(self.client.get(url)))
+        self.assertEqual(feed["items"], [])
+        Follow.objects.create(user=self.reader, author=self.author)
+        feed = json.loads(content(self.client.get(url)))
+        self.assertEqual(
+            [item["title"] for item in feed["items"]], ["Филин ухает"]
+        )
+        bad = reverse("posts:follow_feed", args=["bad:token", "rss"])
+        self.assertEqual(self.client.get(bad).status_code, 404)
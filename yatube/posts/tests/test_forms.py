@@ -1,3 +1,4 @@
+import os
 import shutil
 import tempfile
 from http import HTTPStatus
@@ -258,3 +259,43 @@ class CommentFormTests(TestCase):
         )
         self.assertEqual(Comment.objects.count(), comment_cnt)
         cache.clear()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, BACKGROUND_WORKERS=0)
+class ThumbnailPregenerationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.creator = User.objects.create(username="creator")
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.cr = Client()
+        self.cr.force_login(self.creator)
+        cache.clear()
+
+    def thumbnails(self):
+        cache_dir = os.path.join(TEMP_MEDIA_ROOT, "cache")
+        return [
+            name for _, _, names in os.walk(cache_dir) for name in names
+        ]
+
+    def test_thumbnails_created_on_save(self):
+        """Миниатюры создаются при сохранении поста с картинкой."""
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        uploaded = SimpleUploadedFile(
+            name="thumb.gif",
+            content=test_img,
+            content_type="image/gif"
+        )
+        self.cr.post(
+            reverse("posts:post_create"),
+            data={"text": "Пост с картинкой", "image": uploaded},
+        )
+        self.assertEqual(
+            len(self.thumbnails()), len(settings.THUMBNAIL_GEOMETRIES)
+        )
@@ -0,0 +1,66 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from posts.models import Comment, Follow, Group, Post
+from posts.timeline import timeline
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN из SQLite")
+class ListQueryIndexTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username="writer")
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        cls.post = Post.objects.create(
+            text="Пост", author=cls.author, group=cls.group
+        )
+
+    def plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            return " | ".join(row[-1] for row in cursor.fetchall())
+
+    def assertIndexRangeScan(self, queryset, index_name):
+        plan = self.plan(queryset)
+        self.assertIn(index_name, plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_cursor_ordering_uses_index(self):
+        """Порядок keyset-пагинации (-pub_date, -id) берётся из индекса."""
+        self.assertIndexRangeScan(
+            Post.objects.filter(group=self.group).order_by(
+                "-pub_date", "-pk"
+            )[:11],
+            "post_group_date_idx",
+        )
+
+    def test_list_queries_use_composite_indexes(self):
+        """Списки читаются диапазоном по составному индексу без сортировки."""
+        cases = {
+            "post_author_date_idx": Post.objects.filter(author=self.author),
+            "post_group_date_idx": Post.objects.filter(group=self.group),
+            "comment_post_date_idx": Comment.objects.filter(post=self.post),
+            "follow_author_user_idx": Follow.objects.filter(
+                author=self.author
+            ).values("user_id"),
+        }
+        for index_name, queryset in cases.items():
+            with self.subTest(index=index_name):
+                self.assertIndexRangeScan(queryset[:10], index_name)
+
+    def test_timeline_pages_over_entries_index(self):
+        """Лента сортируется по полям TimelineEntry из индекса."""
+        reader = User.objects.create(username="reader")
+        Follow.objects.create(user=reader, author=self.author)
+        self.assertIndexRangeScan(
+            timeline(reader).select_related("author", "group")[:11],
+            "timeline_user_date_idx",
+        )
@@ -0,0 +1,114 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from posts import search
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username="writer")
+        cls.group = Group.objects.create(
+            title="Совы",
+            slug="owls",
+            description="Филин, сыч и другие совы"
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.rare = Post.objects.create(
+            text="Филин живёт в лесу", author=self.author
+        )
+        self.often = Post.objects.create(
+            text="Филин, филин и ещё раз филин", author=self.author
+        )
+        Post.objects.create(text="Про котов", author=self.author)
+
+    def test_search_view_ranks_posts(self):
+        """Поиск находит посты и группы, релевантные выше."""
+        response = self.client.get(reverse("posts:search"), {"q": "ФИЛИН"})
+        self.assertEqual(
+            list(response.context["page_obj"]), [self.often, self.rare]
+        )
+        self.assertEqual(list(response.context["groups"]), [self.group])
+
+    def test_all_terms_required(self):
+        """Все слова запроса должны встретиться в посте."""
+        self.assertEqual(search.search("post", "филин лесу"), [self.rare.pk])
+
+    def test_index_follows_edit_and_delete(self):
+        """Индекс обновляется при правке и удалении поста."""
+        self.rare.text = "Сова живёт в дупле"
+        self.rare.save()
+        self.assertEqual(search.search("post", "дупле"), [self.rare.pk])
+        self.assertEqual(search.search("post", "филин"), [self.often.pk])
+        self.often.delete()
+        self.assertEqual(search.search("post", "филин"), [])
+
+    def test_rebuild_indexes_bulk_created_posts(self):
+        """rebuild_search_index добавляет посты, созданные bulk_create."""
+        Post.objects.bulk_create([Post(text="Сычик", author=self.author)])
+        self.assertEqual(search.search("post", "сычик"), [])
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(len(search.search("post", "сычик")), 1)
+        self.assertEqual(len(search.search("post", "филин")), 2)
+
+    def test_empty_query(self):
+        """Пустой запрос ничего не находит."""
+        response = self.client.get(reverse("posts:search"), {"q": " "})
+        self.assertEqual(len(response.context["page_obj"]), 0)
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идёт через индекс."""
+        admin = User.objects.create_superuser("admin", "a@a.ru", "pass")
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse("admin:posts_post_changelist"), {"q": "филин"}
+        )
+        self.assertEqual(response.context["cl"].result_count, 2)
+
+    def test_missing_fts5_tables_are_not_remembered(self):
+        """Отсутствие таблиц FTS5 перепроверяется после миграции."""
+        with mock.patch.object(search, "_fts5_ready", False):
+            with mock.patch.object(
+                search.connection.introspection, "table_names",
+                return_value=[],
+            ):
+                self.assertFalse(search.fts5_tables_exist())
+            self.assertEqual(
+                search.fts5_tables_exist(),
+                search.connection.vendor == "sqlite",
+            )
+
+    @override_settings(SEARCH_ADMIN_MAX_RESULTS=1)
+    def test_admin_search_reports_truncation(self):
+        """Админка предупреждает, что показаны не все найденные."""
+        admin = User.objects.create_superuser("admin", "a@a.ru", "pass")
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse("admin:posts_post_changelist"), {"q": "филин"}
+        )
+        self.assertEqual(response.context["cl"].result_count, 1)
+        self.assertIn(
+            "уточните запрос",
+            [str(message) for message in response.context["messages"]][0],
+        )
+
+
+@override_settings(SEARCH_BACKEND="inverted")
+class InvertedIndexSearchTests(SearchTests):
+    """Те же проверки для резервного индекса SearchTerm."""
+
+    def test_backend(self):
+        self.assertIsInstance(
+            search.backend(), search.InvertedIndexBackend
+        )
@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from posts.models import Follow, Post, TimelineEntry
+from posts.timeline import backfill_followers, timeline
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username="reader")
+        cls.author = User.objects.create(username="writer")
+        cls.old_post = Post.objects.create(
+            text="Пост до подписки",
+            author=cls.author,
+        )
+
+    def test_follow_backfills_timeline(self):
+        """Подписка добавляет в ленту уже опубликованные посты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertIn(self.old_post, timeline(self.reader))
+
+    def test_new_post_fans_out(self):
+        """Новый пост раскладывается по лентам подписчиков."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text="Новый пост", author=self.author)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+
+    def test_unfollow_prunes_timeline(self):
+        """Отписка убирает посты автора из ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.filter(user=self.reader, author=self.author).delete()
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertNotIn(self.old_post, timeline(self.reader))
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_heavy_author_read_on_request(self):
+        """Посты популярного автора не рассылаются, а читаются в ленте."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text="Новый пост", author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertEqual(
+            list(timeline(self.reader)), [post, self.old_post]
+        )
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_unfollow_backfill_runs_in_background(self):
+        """Дозаполнение лент после отписки не выполняется в запросе."""
+        other = User.objects.create(username="other")
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=other, author=self.author)
+        with mock.patch("posts.timeline.background.submit") as submit:
+            Follow.objects.filter(user=other, author=self.author).delete()
+        submit.assert_called_once_with(backfill_followers, self.author.pk)
+        backfill_followers(self.author.pk)
+        self.assertIn(self.old_post, timeline(self.reader))
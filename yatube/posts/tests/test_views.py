@@ -259,6 +259,115 @@ class PostsViewTests(TestCase):
         cache.clear()
 
 
+class PageCacheInvalidationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username="writer")
+        cls.reader = User.objects.create(username="reader")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test_slug",
+            description="Текст описания тестовой группы"
+        )
+        cls.pages: tuple = (
+            reverse("posts:index"),
+            reverse("posts:group_list", kwargs={"slug": cls.group.slug}),
+            reverse("posts:profile", kwargs={"username": "writer"}),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pages_cached_until_change(self):
+        """Страница отдаётся из кэша, пока данные не изменились."""
+        for page in self.pages:
+            with self.subTest(page=page):
+                self.assertIsNotNone(self.client.get(page).context)
+                self.assertIsNone(self.client.get(page).context)
+
+    def test_new_post_invalidates_pages(self):
+        """Новый пост сразу виден на всех закэшированных страницах."""
+        for page in self.pages:
+            self.client.get(page)
+        Post.objects.create(
+            text="Свежий пост", author=self.author, group=self.group
+        )
+        for page in self.pages:
+            with self.subTest(page=page):
+                self.assertContains(self.client.get(page), "Свежий пост")
+
+    def test_comment_and_group_invalidate_pages(self):
+        """Комментарий и правка группы сбрасывают кэш страниц."""
+        post = Post.objects.create(
+            text="Пост", author=self.author, group=self.group
+        )
+        for page in self.pages:
+            self.client.get(page)
+        Comment.objects.create(post=post, author=self.reader, text="Ок")
+        for page in self.pages:
+            with self.subTest(page=page):
+                self.assertIsNotNone(self.client.get(page).context)
+        self.group.title = "Переименованная группа"
+        self.group.save()
+        self.assertContains(
+            self.client.get(self.pages[1]), "Переименованная группа"
+        )
+
+    def test_group_change_invalidates_profile(self):
+        """Правка и удаление группы обновляют карточки в профиле."""
+        group = Group.objects.create(title="Группа", slug="other_slug")
+        Post.objects.create(text="Пост", author=self.author, group=group)
+        self.client.get(self.pages[2])
+        group.title = "Переименованная группа"
+        group.save()
+        self.assertContains(
+            self.client.get(self.pages[2]), "Переименованная группа"
+        )
+        group.delete()
+        self.assertNotContains(self.client.get(self.pages[2]), "/group/")
+
+    def test_commenter_rename_invalidates_pages(self):
+        """Новое имя комментатора видно в профиле и на странице поста."""
+        post = Post.objects.create(text="Пост", author=self.author)
+        Comment.objects.create(post=post, author=self.reader, text="Ок")
+        pages = (
+            self.pages[2],
+            reverse("posts:post_detail", kwargs={"post_id": post.pk}),
+        )
+        for page in pages:
+            self.client.get(page)
+        self.reader.username = "renamed_reader"
+        self.reader.save()
+        for page in pages:
+            with self.subTest(page=page):
+                self.assertContains(self.client.get(page), "renamed_reader")
+
+    def test_password_change_keeps_pages_cached(self):
+        """Смена пароля и прав не сбрасывает кэш страниц."""
+        for page in self.pages:
+            self.client.get(page)
+        self.author.set_password("secret")
+        self.author.is_staff = True
+        self.author.save()
+        for page in self.pages:
+            with self.subTest(page=page):
+                self.assertIsNone(self.client.get(page).context)
+
+    def test_follow_invalidates_profile(self):
+        """Подписка обновляет счётчик подписчиков в профиле."""
+        self.client.get(self.pages[2])
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertContains(self.client.get(self.pages[2]), "Подписчиков: 1")
+
+    def test_pages_cached_per_user(self):
+        """Кэш страницы не делится между пользователями."""
+        self.client.force_login(self.reader)
+        self.client.get(self.pages[0])
+        guest = Client()
+        self.assertNotContains(guest.get(self.pages[0]), "reader")
+
+
 class PaginatorViewsTest(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -324,6 +433,90 @@ class PaginatorViewsTest(TestCase):
         cache.clear()
 
 
+class StaleCountPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username="auth")
+        for number in range(cnt_posts):
+            Post.objects.create(author=cls.author, text=f"Пост {number}")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_page_beyond_stale_count(self):
+        """Пост сверх закэшированного числа виден на второй странице."""
+        self.client.get(reverse("posts:index"))
+        Post.objects.create(author=self.author, text="Лишний пост")
+        # Пересчёт числа постов ушёл в фоновый пул после коммита, в
+        # TestCase он не выполняется, и главная видит прежние 10.
+        first = self.client.get(reverse("posts:index"))
+        self.assertContains(first, "page=2")
+        second = self.client.get(reverse("posts:index") + "?page=2")
+        self.assertEqual(second.context["page_obj"].number, 2)
+        self.assertEqual(len(second.context["page_obj"]), 1)
+
+
+@override_settings(PAGINATION_MODES={
+    "posts:index": "cursor",
+    "posts:group_list": "cursor",
+    "posts:profile": "cursor",
+})
+class CursorPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_auth = User.objects.create(username="auth")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test_slug",
+            description="Текст описания тестовой группы"
+        )
+        Post.objects.bulk_create([
+            Post(
+                author=cls.user_auth,
+                text=f"Тестовый пост{i}",
+                group=cls.group
+            )
+            for i in range(count_test_post)
+        ])
+        cls.pages: tuple = (
+            reverse("posts:index"),
+            reverse("posts:profile",
+                    kwargs={"username": f"{cls.user_auth.username}"}),
+            reverse("posts:group_list",
+                    kwargs={"slug": f"{cls.group.slug}"}))
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def test_cursor_pages(self):
+        """Курсорная пагинация отдаёт все посты без повторов."""
+        for page in self.pages:
+            with self.subTest(page=page):
+                first = self.client.get(page).context["page_obj"]
+                self.assertEqual(len(first), cnt_posts)
+                self.assertFalse(first.has_previous())
+                second = self.client.get(
+                    f"{page}?cursor={first.next_cursor}"
+                ).context["page_obj"]
+                self.assertEqual(len(second), count_test_post - cnt_posts)
+                self.assertFalse(second.has_next())
+                self.assertFalse(set(first) & set(second))
+                back = self.client.get(
+                    f"{page}?cursor={second.previous_cursor}"
+                ).context["page_obj"]
+                self.assertEqual(list(back), list(first))
+                cache.clear()
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Битый курсор открывает первую страницу."""
+        response = self.client.get(self.pages[0] + "?cursor=owls")
+        self.assertEqual(len(response.context["page_obj"]), cnt_posts)
+        self.assertContains(response, "?cursor=")
+
+
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class FollowCommentViewsTest(TestCase):
     @classmethod
@@ -479,3 +672,84 @@ class FollowCommentViewsTest(TestCase):
             response,
             "/auth/login/?next=%2Fposts%2F1%2Fcomment%2F"
         )
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username="writer")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test_slug",
+            description="Текст описания тестовой группы"
+        )
+        cls.post = Post.objects.create(
+            text="Тестовый пост", author=cls.author, group=cls.group
+        )
+        cls.detail = reverse("posts:post_detail", args=[cls.post.pk])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_list_pages_answer_not_modified(self):
+        """Списки отдают 304 по ETag, пока данные не изменились."""
+        pages = (
+            reverse("posts:group_list", kwargs={"slug": self.group.slug}),
+            reverse("posts:profile", kwargs={"username": "writer"}),
+        )
+        for page in pages:
+            with self.subTest(page=page):
+                etag = self.client.get(page)["ETag"]
+                response = self.client.get(page, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+        Post.objects.create(
+            text="Свежий пост", author=self.author, group=self.group
+        )
+        for page in pages:
+            with self.subTest(page=page):
+                response = self.client.get(page, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_post_detail_etag(self):
+        """Страница поста отдаёт 304 по ETag до нового комментария."""
+        etag = self.client.get(self.detail)["ETag"]
+        response = self.client.get(self.detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Comment.objects.create(
+            post=self.post, author=self.author, text="Комментарий"
+        )
+        response = self.client.get(self.detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_post_detail_has_no_last_modified(self):
+        """Страница поста отдаёт только ETag: по дате 304 не бывает."""
+        response = self.client.get(self.detail)
+        self.assertNotIn("Last-Modified", response)
+        response = self.client.get(
+            self.detail, HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT"
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_post_detail_etag_follows_author_posts(self):
+        """Новый пост автора меняет ETag: на странице число его постов."""
+        etag = self.client.get(self.detail)["ETag"]
+        Post.objects.create(text="Второй пост", author=self.author)
+        response = self.client.get(self.detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["author_cnt_posts"], 2)
+
+    def test_post_detail_etag_follows_csrf_token(self):
+        """После повторного входа страница с формой рендерится заново."""
+        self.client.force_login(self.author)
+        self.client.get(self.detail)
+        etag = self.client.get(self.detail)["ETag"]
+        response = self.client.get(self.detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.client.logout()
+        self.client.force_login(self.author)
+        # Вход меняет секрет CSRF, браузер получает новую cookie.
+        self.client.cookies["csrftoken"] = "x" * 64
+        response = self.client.get(self.detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
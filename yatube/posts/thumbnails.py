@@ -0,0 +1,48 @@
+import hashlib
+
+from core import background
+from django.conf import settings
+from django.core.cache import cache
+from sorl.thumbnail import get_thumbnail
+
+url_timeout: int = 60 * 60 * 24 * 30
+pending_timeout: int = 60
+
+
+def url_key(name, geometry):
+    digest = hashlib.md5(f"{geometry}:{name}".encode()).hexdigest()
+    return f"thumbnail_url:{digest}"
+
+
+def pregenerate(name):
+    """Создаёт все миниатюры изображения и кладёт их в KV-хранилище
+    sorl, чтобы {% thumbnail %} в шаблонах не запускал Pillow. Адреса
+    миниатюр запоминаются для ready_urls()."""
+    urls = {}
+    for geometry, options in settings.THUMBNAIL_GEOMETRIES:
+        urls[url_key(name, geometry)] = get_thumbnail(
+            name, geometry, **options
+        ).url
+    cache.set_many(urls, url_timeout)
+
+
+def schedule(post):
+    if post.image:
+        background.submit(pregenerate, post.image.name)
+
+
+def ready_urls(names, geometry):
+    """Адреса уже созданных миниатюр: {имя изображения: url}.
+
+    Одно чтение кэша на все имена, без Pillow и KV-хранилища sorl. Для
+    изображений без готовой миниатюры генерация уходит в фоновый пул
+    (не чаще раза в pending_timeout), а в ответе их нет.
+    """
+    keys = {url_key(name, geometry): name for name in set(names)}
+    found = cache.get_many(list(keys))
+    for key, name in keys.items():
+        if key not in found and cache.add(
+            f"{key}:pending", True, pending_timeout
+        ):
+            background.submit(pregenerate, name)
+    return {keys[key]: url for key, url in found.items()}
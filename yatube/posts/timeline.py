@@ -0,0 +1,99 @@
+from core import background
+from django.conf import settings
+from django.db.models import F, Q
+
+from .models import Follow, Post, TimelineEntry, UserCounters
+
+
+def follower_count(author_id):
+    followers = UserCounters.objects.filter(user_id=author_id).values_list(
+        "followers", flat=True
+    ).first()
+    return followers or 0
+
+
+def is_fan_out_author(author_id):
+    """Посты автора рассылаются по лентам, пока подписчиков не слишком
+    много; посты популярных авторов подмешиваются в ленту при чтении."""
+    return follower_count(author_id) <= settings.TIMELINE_FANOUT_LIMIT
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if not is_fan_out_author(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list("user_id", flat=True)
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in followers.iterator()
+        ),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту последние посты автора после подписки."""
+    if not is_fan_out_author(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        "pk", "pub_date"
+    )[:settings.TIMELINE_BACKFILL]
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+            for pk, pub_date in posts
+        ],
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты посты автора после отписки."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+    # Автор снова стал "обычным": посты, опубликованные, пока он читался
+    # при запросе ленты, нужно разложить оставшимся подписчикам. Это до
+    # TIMELINE_FANOUT_LIMIT * TIMELINE_BACKFILL вставок, поэтому не в
+    # запросе отписки, а в фоне.
+    if follower_count(author_id) == settings.TIMELINE_FANOUT_LIMIT:
+        background.submit(backfill_followers, author_id)
+
+
+def backfill_followers(author_id):
+    """Заполняет ленты всех подписчиков автора его последними постами."""
+    followers = Follow.objects.filter(
+        author_id=author_id
+    ).values_list("user_id", flat=True)
+    for follower_id in followers.iterator():
+        backfill(follower_id, author_id)
+
+
+def timeline(user):
+    """Посты ленты подписок пользователя.
+
+    Обычные авторы читаются из материализованной ленты: порядок задают
+    поля TimelineEntry, и страница идёт по индексу timeline_user_date_idx,
+    а посты присоединяются по первичному ключу. Популярные авторы
+    подмешиваются напрямую из Post (fan-out-on-read).
+    """
+    heavy_authors = list(Follow.objects.filter(
+        user=user,
+        author__counters__followers__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).values_list("author_id", flat=True))
+    if not heavy_authors:
+        return Post.objects.filter(timeline_entries__user=user).order_by(
+            # F(), а не строки: по имени FK Django сортировал бы по
+            # ordering модели Post через лишний JOIN.
+            F("timeline_entries__pub_date").desc(),
+            F("timeline_entries__post_id").desc(),
+        )
+    entries = TimelineEntry.objects.filter(user=user).values("post_id")
+    return Post.objects.filter(
+        Q(pk__in=entries) | Q(author_id__in=heavy_authors)
+    )
@@ -1,8 +1,10 @@
-from django.urls import path
+from django.urls import path, register_converter
 
-from . import views
+from . import feeds, views
+from .converters import FeedFormatConverter
 
 app_name = "posts"
+register_converter(FeedFormatConverter, "feed")
 
 urlpatterns = [path("",
                     views.index,
@@ -20,6 +22,14 @@ urlpatterns = [path("",
                     views.post_detail,
                     name="post_detail"
                     ),
+               path("posts/<int:post_id>/comments/",
+                    views.post_comments,
+                    name="post_comments"
+                    ),
+               path("search/",
+                    views.search,
+                    name="search"
+                    ),
                path("create/",
                     views.post_create,
                     name="post_create"
@@ -44,4 +54,20 @@ urlpatterns = [path("",
                     views.profile_unfollow,
                     name="profile_unfollow"
                     ),
+               path("feed.<feed:feed_format>",
+                    feeds.index_feed,
+                    name="index_feed"
+                    ),
+               path("group/<slug:slug>/feed.<feed:feed_format>",
+                    feeds.group_feed,
+                    name="group_feed"
+                    ),
+               path("profile/<str:username>/feed.<feed:feed_format>",
+                    feeds.profile_feed,
+                    name="profile_feed"
+                    ),
+               path("follow/<str:token>/feed.<feed:feed_format>",
+                    feeds.follow_feed,
+                    name="follow_feed"
+                    ),
                ]
@@ -1,73 +1,127 @@
+from core.caching import (conditional_page, stampede_safe_cache_page,
+                          versioned_cache_page)
+from core.paginators import CountedPaginator, CursorPaginator
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.utils.http import urlencode
 
+from .cards import render_post_cards
+from .comments import attach_comment_previews, comment_page
+from .counters import (counters_for, group_count, index_count,
+                       profile_count)
+from .feeds import follow_feed_token
 from .forms import CommentForm, PostForm
+from .invalidation import (group_namespaces, index_namespaces,
+                           post_validators, profile_namespaces)
 from .models import Follow, Group, Post, User
+from .search import search_groups, search_posts
+from .thumbnails import schedule as schedule_thumbnails
+from .timeline import timeline
 
 cnt_posts: int = 10
+cnt_groups: int = 5
 size_text: int = 30
-cache_time: int = 20
 
 
-def paginator(request, post_list, cnt_posts):
-    paginator = Paginator(post_list, cnt_posts)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+def pagination_mode(request):
+    match = request.resolver_match
+    view_name = match.view_name if match else None
+    return settings.PAGINATION_MODES.get(view_name, "offset")
+
+
+def paginator(request, post_list, cnt_posts, count=None):
+    """Страница постов вместе с превью комментариев к ним.
+
+    count() возвращает число постов из счётчика или кэша вместо
+    COUNT(*); при пагинации курсором он не вызывается.
+    """
+    if pagination_mode(request) == "cursor":
+        paginator = CursorPaginator(post_list, cnt_posts)
+        page_obj = paginator.get_page(request.GET.get("cursor"))
+    else:
+        paginator = CountedPaginator(
+            post_list, cnt_posts, count() if count else None
+        )
+        page_number = request.GET.get("page")
+        page_obj = paginator.get_page(page_number)
+    attach_comment_previews(page_obj)
     return page_obj
 
 
-@cache_page(cache_time, key_prefix="index_page")
+@stampede_safe_cache_page(
+    settings.PAGE_CACHE_TIMEOUT, "index_page", index_namespaces
+)
 def index(request):
     template = "posts/index.html"
     post_list = Post.objects.select_related("author", "group")
-    page_obj = paginator(request, post_list, cnt_posts)
+    page_obj = paginator(request, post_list, cnt_posts, index_count)
     context = {
         "page_obj": page_obj,
+        "post_cards": render_post_cards(page_obj),
     }
     return render(request, template, context)
 
 
+@versioned_cache_page(
+    settings.PAGE_CACHE_TIMEOUT, "group_page", group_namespaces
+)
 def group_posts(request, slug):
     template = "posts/group_list.html"
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.group.select_related("group")
-    page_obj = paginator(request, post_list, cnt_posts)
+    post_list = group.group.select_related("author", "group")
+    page_obj = paginator(
+        request, post_list, cnt_posts, lambda: group_count(group)
+    )
     context = {
         "group": group,
         "page_obj": page_obj,
+        "post_cards": render_post_cards(page_obj),
     }
     return render(request, template, context)
 
 
+@versioned_cache_page(
+    settings.PAGE_CACHE_TIMEOUT, "profile_page", profile_namespaces
+)
 def profile(request, username):
     template = "posts/profile.html"
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.select_related("author")
-    count_posts = author.posts.count()
+    author = get_object_or_404(
+        User.objects.select_related("counters"),
+        username=username
+    )
+    counters = counters_for(author)
+    post_list = author.posts.select_related("author", "group")
     following = request.user.is_authenticated and Follow.objects.filter(
         user=request.user,
         author=author
     ).exists()
-    page_obj = paginator(request, post_list, cnt_posts)
+    page_obj = paginator(
+        request, post_list, cnt_posts, lambda: profile_count(author)
+    )
     context = {
         "author": author,
-        "count_posts": count_posts,
+        "count_posts": counters.posts,
+        "counters": counters,
         "page_obj": page_obj,
+        "post_cards": render_post_cards(page_obj),
         "following": following,
     }
     return render(request, template, context)
 
 
+@conditional_page("post_page", post_validators)
 def post_detail(request, post_id):
     template = "posts/post_detail.html"
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related("author__counters", "group"),
+        pk=post_id
+    )
     post_title = post.text[:size_text]
     author = post.author
-    author_cnt_posts = author.posts.select_related("author").count()
+    author_cnt_posts = counters_for(author).posts
     form = CommentForm(request.POST or None)
-    comments = post.comments.select_related("author")
+    comments = comment_page(post.pk, request.GET.get("comments"))
     context = {
         "post": post,
         "post_title": post_title,
@@ -79,6 +133,32 @@ def post_detail(request, post_id):
     return render(request, template, context)
 
 
+@conditional_page("post_comments", post_validators)
+def post_comments(request, post_id):
+    """Следующая порция комментариев HTML-фрагментом для «Показать ещё»."""
+    template = "includes/comment_list.html"
+    get_object_or_404(Post.objects.only("pk"), pk=post_id)
+    context = {
+        "post_id": post_id,
+        "comments": comment_page(post_id, request.GET.get("cursor")),
+    }
+    return render(request, template, context)
+
+
+def search(request):
+    template = "posts/search.html"
+    query = request.GET.get("q", "").strip()
+    page_obj = paginator(request, search_posts(query), cnt_posts)
+    context = {
+        "query": query,
+        "groups": search_groups(query, cnt_groups),
+        "page_obj": page_obj,
+        "post_cards": render_post_cards(page_obj),
+        "page_query": urlencode({"q": query}) + "&",
+    }
+    return render(request, template, context)
+
+
 @login_required
 def post_create(request):
     template = "posts/create_post.html"
@@ -90,6 +170,8 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        if "image" in form.changed_data:
+            schedule_thumbnails(post)
         return redirect(f"/profile/{post.author}/", {"form": form})
     form.errors
     return render(request, template, {"form": form})
@@ -111,6 +193,8 @@ def post_edit(request, post_id):
     if request.user == author:
         if request.method == "POST" and form.is_valid:
             post = form.save()
+            if "image" in form.changed_data:
+                schedule_thumbnails(post)
             return redirect(template_post, post_id)
         context = {
             "form": form,
@@ -138,10 +222,12 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     template = "posts/follow.html"
-    post_list = Post.objects.filter(author__following__user=request.user)
+    post_list = timeline(request.user).select_related("author", "group")
     page_obj = paginator(request, post_list, cnt_posts)
     context = {
         "page_obj": page_obj,
+        "post_cards": render_post_cards(page_obj),
+        "feed_token": follow_feed_token(request.user),
     }
     return render(request, template, context)
 
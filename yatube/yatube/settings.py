@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 
 import os
 
+from core.cache_backends import cache_settings
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -46,10 +48,12 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -57,16 +61,28 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
+    'core.middleware.AnonymousPageCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
 
+# Template production profile: cached.Loader keeps compiled templates in the
+# worker's memory, and CoreConfig.ready loads every template from templates/
+# at startup. manage.py compile_templates reports per-template compile time.
+TEMPLATE_PRODUCTION = os.getenv('YATUBE_TEMPLATE_PRODUCTION', '') == '1'
+TEMPLATE_WARMUP = TEMPLATE_PRODUCTION
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
+        'APP_DIRS': not TEMPLATE_PRODUCTION,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -78,6 +94,10 @@ TEMPLATES = [
         },
     },
 ]
+if TEMPLATE_PRODUCTION:
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
@@ -85,13 +105,53 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# SQLite production profile: WAL (readers do not wait for writers),
+# synchronous=NORMAL, mmap and a large page cache, waiting on locks instead
+# of failing, and persistent connections. core.signals.apply_sqlite_pragmas
+# applies the pragmas to every new connection.
+SQLITE_PRODUCTION = os.getenv('YATUBE_SQLITE_PRODUCTION', '') == '1'
+SQLITE_PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+SQLITE_PRODUCTION_CONN_MAX_AGE = 600
+SQLITE_PRAGMAS = SQLITE_PRODUCTION_PRAGMAS if SQLITE_PRODUCTION else {}
+SQLITE_CONN_MAX_AGE = (
+    SQLITE_PRODUCTION_CONN_MAX_AGE if SQLITE_PRODUCTION else 0
+)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': SQLITE_CONN_MAX_AGE,
     }
 }
 
+# Read replicas: comma-separated SQLite file paths. Locally they are
+# refreshed by manage.py sync_replicas (or by every write request when
+# REPLICA_SYNC_AFTER_WRITE is on); in tests replicas mirror default.
+DATABASE_REPLICAS = []
+for number, path in enumerate(
+    filter(None, os.getenv('YATUBE_DB_REPLICAS', '').split(',')), start=1
+):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'CONN_MAX_AGE': SQLITE_CONN_MAX_AGE,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['core.db_routers.ReplicaRouter']
+# How long a browser keeps reading from the primary after a write (seconds).
+REPLICA_PIN_SECONDS = 5
+REPLICA_SYNC_AFTER_WRITE = os.getenv('YATUBE_REPLICA_SYNC', '') == '1'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -143,10 +203,135 @@ CSRF_FAILURE_VIEW = "core.views.csrf_failure"
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Pagination: "offset" (Paginator, ?page=) or "cursor" (keyset, ?cursor=)
+
+PAGINATION_MODES = {
+    'posts:index': 'offset',
+    'posts:group_list': 'offset',
+    'posts:profile': 'offset',
+    'posts:follow_index': 'offset',
+}
+
+# Follow timeline: posts are fanned out on write to the followers of authors
+# with at most TIMELINE_FANOUT_LIMIT followers; posts of bigger authors are
+# merged in on read. TIMELINE_BACKFILL caps posts copied on a new follow.
+
+TIMELINE_FANOUT_LIMIT = 1000
+TIMELINE_BACKFILL = 500
+TIMELINE_BATCH_SIZE = 500
+
 # Caches for optimization
+# YATUBE_CACHE_URL selects a cache shared by all workers: redis://host:port/db
+# (django-redis), memcached://host:port (pylibmc) or file:///path. The client
+# package must be installed. While the server is unavailable requests are
+# served by a file-based cache in CACHE_FALLBACK_DIR and a warning is logged.
+# Without a URL every process keeps its own LocMemCache.
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+CACHE_FALLBACK_DIR = os.path.join(BASE_DIR, 'cache')
+
+CACHES = cache_settings(
+    os.getenv('YATUBE_CACHE_URL', ''),
+    fallback_dir=CACHE_FALLBACK_DIR,
+    pool_size=int(os.getenv('YATUBE_CACHE_POOL_SIZE', 10)),
+    near_cache=os.getenv('YATUBE_NEAR_CACHE', '1') == '1',
+)
+
+# index, group_posts and profile pages are cached until a Post, Comment,
+# Group or Follow change bumps the version of their namespace
+
+PAGE_CACHE_TIMEOUT = 60 * 60 * 6
+
+# Rendered post cards are cached per post and invalidated by version stamps
+
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Full pages for anonymous cookie-less GETs (core.middleware.
+# AnonymousPageCacheMiddleware): url name -> timeout, query parameters the
+# page depends on and the version namespaces function. An expired or
+# invalidated page is re-rendered by one request under a lock while the
+# others get the stale copy for up to ANONYMOUS_PAGE_CACHE_STALE seconds.
+
+ANONYMOUS_PAGE_CACHE = {
+    'posts:index': {
+        'timeout': 60 * 10,
+        'params': ['page', 'cursor'],
+        'namespaces': 'posts.invalidation.index_namespaces',
+    },
+    'posts:group_list': {
+        'timeout': 60 * 10,
+        'params': ['page', 'cursor'],
+        'namespaces': 'posts.invalidation.group_namespaces',
+    },
+    'posts:profile': {
+        'timeout': 60 * 10,
+        'params': ['page', 'cursor'],
+        'namespaces': 'posts.invalidation.profile_namespaces',
+    },
+    'posts:post_detail': {
+        'timeout': 60 * 10,
+        'params': ['comments'],
+        'namespaces': 'posts.invalidation.post_namespaces',
+    },
+    'posts:post_comments': {
+        'timeout': 60 * 10,
+        'params': ['cursor'],
+        'namespaces': 'posts.invalidation.post_namespaces',
+    },
+    'about:author': {'timeout': 60 * 60 * 24},
+    'about:tech': {'timeout': 60 * 60 * 24},
+}
+ANONYMOUS_PAGE_CACHE_STALE = 60
+ANONYMOUS_PAGE_CACHE_LOCK = 10
+
+# Page chrome ({% cached_include %}: header and switcher) is cached per view
+# name, auth state and username
+
+FRAGMENT_CACHE_TIMEOUT = 60 * 60
+
+# Full-text search: "auto" uses SQLite FTS5 when its tables exist and the
+# SearchTerm inverted index otherwise; "inverted" forces the fallback.
+# Admin search shows at most SEARCH_ADMIN_MAX_RESULTS objects and warns when
+# more were found; the limit stays below SQLite's 999 query parameters
+
+SEARCH_BACKEND = 'auto'
+SEARCH_MAX_RESULTS = 500
+SEARCH_ADMIN_MAX_RESULTS = 900
+
+# API tokens (POST /api/v1/token/) for non-browser clients: signed, valid
+# for API_TOKEN_MAX_AGE seconds and revoked by a password change
+
+API_TOKEN_MAX_AGE = 60 * 60 * 24 * 30
+
+# Background worker pool (core.background); 0 runs tasks inline
+
+BACKGROUND_WORKERS = 2
+
+# Thumbnails pre-generated when a post image is saved. Keep in sync with the
+# {% thumbnail %} tags in includes/bl_posts.html and posts/post_detail.html.
+
+THUMBNAIL_GEOMETRIES = [
+    ('1080x256', {'crop': 'center', 'upscale': True}),
+    ('1080', {'crop': 'center', 'upscale': True}),
+]
+
+# Per-request metrics (core.middleware.PerformanceMiddleware): Server-Timing
+# header and JSON lines in the "yatube.perf" logger, plus a per-URL-name
+# summary every PERF_DUMP_INTERVAL seconds
+
+PERF_INSTRUMENTATION = os.getenv('YATUBE_PERF', '') == '1'
+PERF_DUMP_INTERVAL = 300
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'perf': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'yatube.perf': {
+            'handlers': ['perf'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
 }